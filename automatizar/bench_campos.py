@@ -0,0 +1,56 @@
+import re
+import time
+import random
+from extracao_campos import compilar_campos, extrair_campos
+
+# Micro-benchmark: extração antiga (regex montada a cada chamada, .*? com DOTALL)
+# contra o motor compilado, em textos de OCR cada vez maiores.
+# Uso: python automatizar/bench_campos.py
+
+CAMPOS_BOLETO = {
+    "Número do Documento": r"\d{5,9}",
+    "Vencimento": r"\d{2}/\d{2}/\d{4}",
+    "Valor do Documento": r"\d{1,3}(?:\.\d{3})*,\d{2}"
+}
+
+PALAVRAS = ["Beneficiário", "Pagador", "Agência", "Carteira", "Espécie", "Sacado", "Banco",
+            "Documento", "Número", "Valor", "Data", "CPF", "CNPJ", "Endereço", "Cidade"]
+
+def extrair_campos_antigo(texto_continuo, campos):
+    encontrados = {}
+    for chave, padrao_base in campos.items():
+        if re.search(re.escape(chave), texto_continuo, re.IGNORECASE):
+            padrao = re.search(
+                rf"{re.escape(chave)}.*?({padrao_base})",
+                texto_continuo,
+                re.IGNORECASE | re.DOTALL
+            )
+            encontrados[chave] = padrao.group(1).strip() if padrao else "Não encontrado"
+    return encontrados
+
+def gerar_texto(tamanho, semente=42):
+    """Texto parecido com OCR: rótulos espalhados e sem os valores (pior caso para o .*?)."""
+    aleatorio = random.Random(semente)
+    partes, total = [], 0
+    while total < tamanho:
+        palavra = aleatorio.choice(PALAVRAS + list(CAMPOS_BOLETO) if aleatorio.random() < 0.05 else PALAVRAS)
+        partes.append(palavra)
+        total += len(palavra) + 1
+    return " ".join(partes)
+
+def medir(funcao, *args, repeticoes=5):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+if __name__ == "__main__":
+    motor = compilar_campos(CAMPOS_BOLETO)
+    print(f"{'caracteres':>12} {'antigo (ms)':>12} {'motor (ms)':>12} {'motor us/kchar':>15}")
+    for tamanho in (1_000, 4_000, 16_000, 64_000, 256_000):
+        texto = gerar_texto(tamanho)
+        antigo = medir(extrair_campos_antigo, texto, CAMPOS_BOLETO)
+        novo = medir(extrair_campos, texto, motor)
+        print(f"{tamanho:>12} {antigo * 1000:>12.2f} {novo * 1000:>12.2f} {novo * 1e6 / (tamanho / 1000):>15.2f}")
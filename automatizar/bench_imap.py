@@ -0,0 +1,199 @@
+import io
+import os
+import time
+import socket
+import shutil
+import imaplib
+import tempfile
+import threading
+import contextlib
+from email.message import EmailMessage
+from imap_estrutura import tokenizar_texto, montar_listas
+import email_imap
+
+# Benchmark do download de anexos contra um servidor IMAP local de mentira,
+# com uma latência fixa por comando para simular a ida e volta até o servidor real.
+# Compara um FETCH por e-mail (lote 1) com FETCH em lote de UIDs.
+# Uso: python automatizar/bench_imap.py
+
+LATENCIA = 0.01      # segundos por comando
+QTD_EMAILS = 200
+TAMANHOS_LOTE = (1, 10, 50, 200)
+
+# -------------------------
+# MENSAGENS DE TESTE
+# -------------------------
+def gerar_mensagem(numero):
+    msg = EmailMessage()
+    msg["From"] = f"Banco {numero % 7} <cobranca{numero % 7}@banco.com.br>"
+    msg["Date"] = "Mon, 06 Oct 2025 10:00:00 +0000"
+    msg["Subject"] = f"Boleto {numero}"
+    msg.set_content("Segue o boleto em anexo.\n" * 20)
+    msg.add_alternative("<p>Segue o boleto em anexo.</p>" * 200, subtype="html")
+    msg.add_attachment(os.urandom(30_000), maintype="image", subtype="png", filename="logo.png", disposition="inline")
+    msg.add_attachment(b"%PDF-1.4\n" + os.urandom(60_000), maintype="application", subtype="pdf", filename=f"boleto_{numero}.pdf")
+    return msg
+
+def citar(valor):
+    return "NIL" if valor is None else '"' + str(valor).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def estrutura_e_secoes(msg, prefixo=""):
+    """BODYSTRUCTURE (texto) e {número da seção: conteúdo codificado} de uma mensagem."""
+    if msg.is_multipart():
+        partes, secoes = [], {}
+        for posicao, filho in enumerate(msg.iter_parts(), 1):
+            estrutura, filhas = estrutura_e_secoes(filho, f"{prefixo}{posicao}.")
+            partes.append(estrutura)
+            secoes.update(filhas)
+        return f'({"".join(partes)} {citar(msg.get_content_subtype().upper())})', secoes
+
+    conteudo = msg.get_payload().encode()
+    params = " ".join(f"{citar(k.upper())} {citar(v)}" for k, v in msg.get_params()[1:]) or None
+    params = f"({params})" if params else "NIL"
+    disposicao = "NIL"
+    if msg.get_content_disposition():
+        nome = msg.get_filename()
+        params_disposicao = f'("FILENAME" {citar(nome)})' if nome else "NIL"
+        disposicao = f"({citar(msg.get_content_disposition().upper())} {params_disposicao})"
+    codificacao = citar((msg["Content-Transfer-Encoding"] or "7bit").upper())
+    linhas = " %d" % conteudo.count(b"\n") if msg.get_content_maintype() == "text" else ""
+    estrutura = (f"({citar(msg.get_content_maintype().upper())} {citar(msg.get_content_subtype().upper())} "
+                 f"{params} NIL NIL {codificacao} {len(conteudo)}{linhas} NIL {disposicao} NIL)")
+    return estrutura, {prefixo[:-1] or "1": conteudo}
+
+# -------------------------
+# SERVIDOR IMAP DE MENTIRA
+# -------------------------
+def literal(conteudo):
+    return b"{%d}\r\n" % len(conteudo) + conteudo
+
+def responder_fetch(caixa, uids, itens):
+    """Monta as linhas '* n FETCH (...)' para os UIDs pedidos."""
+    resposta = io.BytesIO()
+    for uid in uids:
+        mensagem = caixa[uid]
+        partes = [b"UID %d" % uid]
+        for item in itens:
+            nome = item.upper().replace(".PEEK", "")
+            if nome == "UID":
+                continue
+            if nome == "BODYSTRUCTURE":
+                partes.append(b"BODYSTRUCTURE " + mensagem['estrutura'])
+            elif nome == "RFC822":
+                partes.append(b"RFC822 " + literal(mensagem['bruto']))
+            elif nome.startswith("BODY[HEADER.FIELDS"):
+                partes.append(nome.encode() + b" " + literal(mensagem['cabecalho']))
+            elif nome.startswith("BODY["):
+                partes.append(nome.encode() + b" " + literal(mensagem['secoes'].get(nome[5:-1], b"")))
+        resposta.write(b"* %d FETCH (" % uid + b" ".join(partes) + b")\r\n")
+    return resposta.getvalue()
+
+def expandir_conjunto(conjunto, caixa):
+    uids = []
+    for faixa in conjunto.split(","):
+        inicio, _, fim = faixa.partition(":")
+        fim = max(caixa) if fim == "*" else int(fim or inicio)
+        uids.extend(uid for uid in range(int(inicio), fim + 1) if uid in caixa)
+    return uids
+
+def atender(conexao, caixa, contador):
+    arquivo = conexao.makefile("rb")
+    conexao.sendall(b"* OK IMAP4rev1 servidor de teste\r\n")
+    for linha in arquivo:
+        tag, _, resto = linha.decode().strip().partition(" ")
+        comando, _, argumentos = resto.partition(" ")
+        comando = comando.upper()
+        if comando == "UID":
+            comando, _, argumentos = argumentos.partition(" ")
+            comando = "UID " + comando.upper()
+        contador['comandos'] += 1
+        time.sleep(LATENCIA)
+
+        if comando == "CAPABILITY":
+            saida = b"* CAPABILITY IMAP4rev1\r\n"
+        elif comando == "LOGIN":
+            saida = b""
+        elif comando in ("SELECT", "EXAMINE"):
+            saida = b"* %d EXISTS\r\n* OK [UIDVALIDITY 1] ok\r\n" % len(caixa)
+        elif comando == "STATUS":
+            saida = b'* STATUS "INBOX" (UIDVALIDITY 1 UIDNEXT %d)\r\n' % (max(caixa) + 1)
+        elif comando == "UID SEARCH":
+            saida = b"* SEARCH " + " ".join(map(str, caixa)).encode() + b"\r\n"
+        elif comando == "UID FETCH":
+            conjunto, _, itens = argumentos.partition(" ")
+            itens = montar_listas(tokenizar_texto(itens.encode()))[0]
+            saida = responder_fetch(caixa, expandir_conjunto(conjunto, caixa), itens)
+        elif comando == "LOGOUT":
+            conexao.sendall(b"* BYE\r\n" + tag.encode() + b" OK\r\n")
+            break
+        else:
+            saida = b""
+        contador['bytes'] += len(saida)
+        conexao.sendall(saida + tag.encode() + b" OK concluido\r\n")
+    conexao.close()
+
+def iniciar_servidor(caixa, contador):
+    servidor = socket.create_server(("127.0.0.1", 0))
+
+    def aceitar():
+        while True:
+            try:
+                conexao, _ = servidor.accept()
+            except OSError:
+                return
+            threading.Thread(target=atender, args=(conexao, caixa, contador), daemon=True).start()
+
+    threading.Thread(target=aceitar, daemon=True).start()
+    return servidor
+
+# -------------------------
+# BENCHMARK
+# -------------------------
+def montar_caixa(qtd):
+    caixa = {}
+    for uid in range(1, qtd + 1):
+        msg = gerar_mensagem(uid)
+        estrutura, secoes = estrutura_e_secoes(msg)
+        bruto = msg.as_bytes()
+        caixa[uid] = {
+            'estrutura': estrutura.encode(),
+            'secoes': secoes,
+            'bruto': bruto,
+            'cabecalho': f"From: {msg['From']}\r\nDate: {msg['Date']}\r\n\r\n".encode()
+        }
+    return caixa
+
+def medir(porta, contador, tamanho_lote, somente_anexos):
+    pasta = tempfile.mkdtemp()
+    email_imap.SAVE_FOLDER = pasta
+    contador['comandos'] = contador['bytes'] = 0
+    try:
+        mail = imaplib.IMAP4("127.0.0.1", porta)
+        mail.login("teste", "teste")
+        mail.select("INBOX", readonly=True)
+        uids = email_imap.search_emails(mail)
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            processados = email_imap.download_attachments(mail, uids, somente_anexos, tamanho_lote)
+        tempo = time.perf_counter() - inicio
+        mail.logout()
+        salvos = len(os.listdir(pasta))
+    finally:
+        shutil.rmtree(pasta)
+    return tempo, len(processados), salvos
+
+if __name__ == "__main__":
+    caixa = montar_caixa(QTD_EMAILS)
+    contador = {'comandos': 0, 'bytes': 0}
+    servidor = iniciar_servidor(caixa, contador)
+    porta = servidor.getsockname()[1]
+
+    print(f"{QTD_EMAILS} e-mails, latência de {LATENCIA * 1000:.0f} ms por comando")
+    print(f"{'modo':>10} {'lote':>6} {'tempo (s)':>10} {'comandos':>9} {'MB recebidos':>13} {'anexos':>7}")
+    for somente_anexos in (False, True):
+        for tamanho_lote in TAMANHOS_LOTE:
+            tempo, processados, salvos = medir(porta, contador, tamanho_lote, somente_anexos)
+            modo = "anexos" if somente_anexos else "RFC822"
+            print(f"{modo:>10} {tamanho_lote:>6} {tempo:>10.2f} {contador['comandos']:>9} "
+                  f"{contador['bytes'] / 1e6:>13.1f} {salvos:>7}")
+    servidor.close()
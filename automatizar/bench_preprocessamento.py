@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+from preprocessamento import criar_preprocessamento
+
+try:
+    import resource  # só Linux/macOS; no Windows a coluna de memória fica vazia
+except ImportError:
+    resource = None
+
+# Micro-benchmark: cadeia antiga do PIL (convert("L") + MedianFilter + Contrast) contra o
+# pré-processamento em NumPy, numa página A4 sintética a 300 dpi (RGB, como vem do pdf2image).
+# Memória = pico de RSS acima do que a página já ocupava, medido num processo novo por variante.
+# Uso: python automatizar/bench_preprocessamento.py
+
+LARGURA, ALTURA = 2480, 3508  # A4 a 300 dpi
+INCLINACAO = 1.5              # graus, como um scan torto
+REPETICOES = 3
+
+def preprocessar_pil(img):
+    """Cadeia antiga do testan.py/modelo.py."""
+    img = img.convert("L")
+    img = img.filter(ImageFilter.MedianFilter())
+    enhancer = ImageEnhance.Contrast(img)
+    img = enhancer.enhance(2)
+    return img
+
+VARIANTES = {
+    "PIL (antigo)": lambda: preprocessar_pil,
+    "numpy cinza+mediana+contraste": lambda: criar_preprocessamento(("cinza", "mediana", "contraste")),
+    "numpy + binarizar": lambda: criar_preprocessamento(("cinza", "mediana", "contraste", "binarizar")),
+    "numpy completo (+deskew)": lambda: criar_preprocessamento()
+}
+
+def gerar_pagina(semente=42):
+    """Blocos escuros em linhas (texto), fundo acinzentado com ruído e a página levemente girada."""
+    aleatorio = np.random.default_rng(semente)
+    img = Image.new("L", (LARGURA, ALTURA), 200)
+    desenho = ImageDraw.Draw(img)
+    for y in range(250, ALTURA - 250, 55):
+        x = 200
+        while x < LARGURA - 300:
+            largura = int(aleatorio.integers(20, 120))
+            desenho.rectangle([x, y, x + largura, y + 28], fill=60)
+            x += largura + int(aleatorio.integers(15, 40))
+    img = img.rotate(INCLINACAO, fillcolor=200)
+    pixels = np.asarray(img, dtype=np.int16) + aleatorio.integers(-25, 26, (ALTURA, LARGURA), dtype=np.int16)
+    cinza = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return Image.merge("RGB", (cinza, cinza, cinza))
+
+def pico_rss_mb():
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / 1e6 if sys.platform == "darwin" else maximo / 1e3  # bytes no macOS, KB no Linux
+
+def medir_memoria(nome, caminho_pagina, fila):
+    """
+    Roda num processo novo: o pico de RSS só sobe, então cada variante precisa do seu.
+    A página vem pronta de um PNG para que gerá-la não seja o maior pico do processo.
+    """
+    pagina = Image.open(caminho_pagina)
+    pagina.load()
+    preprocessar = VARIANTES[nome]()
+    preprocessar(pagina.resize((64, 64)))  # aquece imports/alocações pequenas
+    antes = pico_rss_mb()
+    preprocessar(pagina)
+    fila.put(pico_rss_mb() - antes)
+
+def medir_tempo(preprocessar, pagina, repeticoes=REPETICOES):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        preprocessar(pagina)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+if __name__ == "__main__":
+    pagina = gerar_pagina()
+    caminho_pagina = os.path.join(tempfile.mkdtemp(), "pagina.png")
+    pagina.save(caminho_pagina)
+    print(f"Página {LARGURA}x{ALTURA} RGB ({LARGURA * ALTURA * 3 / 1e6:.0f} MB), melhor de {REPETICOES}")
+    print(f"{'variante':>30} {'ms/página':>10} {'pico extra (MB)':>16}")
+    for nome, criar in VARIANTES.items():
+        tempo = medir_tempo(criar(), pagina)
+        memoria = "-"
+        if resource:
+            fila = multiprocessing.Queue()
+            processo = multiprocessing.Process(target=medir_memoria, args=(nome, caminho_pagina, fila))
+            processo.start()
+            memoria = f"{fila.get():.1f}"
+            processo.join()
+        print(f"{nome:>30} {tempo * 1000:>10.0f} {memoria:>16}")
+    os.remove(caminho_pagina)
@@ -0,0 +1,51 @@
+import os
+import json
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+# Inferência do classificador de documentos exportado para ONNX (resultados/exportar_onnx.py),
+# sem torch. Devolve uma função com a mesma chamada do pipeline do transformers
+# (classificador(textos, truncation=True, batch_size=n) -> [{'label', 'score'}]),
+# então lerpdfocr.classificar_lote funciona igual com qualquer um dos dois.
+
+ARQUIVO_ONNX_INT8 = "modelo_int8.onnx"
+ARQUIVO_ONNX = "modelo.onnx"
+MAX_TOKENS = 256
+
+def ler_rotulos(pasta_modelo):
+    """Rótulos na ordem dos logits, a partir do id2label do config.json."""
+    with open(os.path.join(pasta_modelo, "config.json"), "r", encoding="utf-8") as f:
+        id2label = json.load(f).get("id2label", {})
+    return [id2label.get(str(i), f"LABEL_{i}") for i in range(max(len(id2label), 2))]
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+def carregar_classificador_onnx(pasta_modelo, arquivo=ARQUIVO_ONNX_INT8, max_tokens=MAX_TOKENS, threads=None):
+    tokenizer = AutoTokenizer.from_pretrained(pasta_modelo)
+    opcoes = ort.SessionOptions()
+    if threads:
+        opcoes.intra_op_num_threads = threads
+    sessao = ort.InferenceSession(os.path.join(pasta_modelo, arquivo), opcoes, providers=["CPUExecutionProvider"])
+    entradas = {entrada.name for entrada in sessao.get_inputs()}
+    rotulos = ler_rotulos(pasta_modelo)
+
+    def classificar(textos, truncation=True, batch_size=None):
+        if isinstance(textos, str):
+            textos = [textos]
+        tamanho_lote = batch_size or len(textos) or 1
+        resultados = []
+        for inicio in range(0, len(textos), tamanho_lote):
+            lote = textos[inicio:inicio + tamanho_lote]
+            # padding=True: só até o maior texto do lote
+            tokens = tokenizer(lote, truncation=truncation, max_length=max_tokens, padding=True, return_tensors="np")
+            alimentacao = {nome: valor.astype(np.int64) for nome, valor in tokens.items() if nome in entradas}
+            probabilidades = softmax(sessao.run(["logits"], alimentacao)[0])
+            for linha in probabilidades:
+                indice = int(linha.argmax())
+                resultados.append({'label': rotulos[indice], 'score': float(linha[indice])})
+        return resultados
+
+    return classificar
@@ -0,0 +1,43 @@
+import re
+import joblib
+from sklearn.pipeline import make_pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+# Primeiro nível da classificação em cascata: TF-IDF de n-gramas de caracteres
+# + regressão logística, treinado no dataset do modelo.py (resultados/modelo_rapido.py).
+# Responde em microssegundos; só o que ele não tem certeza vai para o transformer.
+
+LIMIAR_CONFIANCA = 0.9  # probabilidade mínima para o nível rápido decidir sozinho
+
+def normalizar_texto(texto):
+    """Igual ao normalizar_texto do modelo.py (datas/valores viram marcadores), em minúsculas."""
+    texto = " ".join(texto.split())
+    texto = re.sub(r"\d{2}/\d{2}/\d{4}", "<DATA>", texto)
+    texto = re.sub(r"\d{1,3}(?:\.\d{3})*,\d{2}", "<VALOR>", texto)
+    return texto.lower()
+
+def criar_modelo_rapido():
+    return make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), preprocessor=normalizar_texto,
+                        sublinear_tf=True, min_df=2, max_features=200_000),
+        LogisticRegression(max_iter=1000, class_weight="balanced")
+    )
+
+def treinar_modelo_rapido(textos, labels):
+    modelo = criar_modelo_rapido()
+    modelo.fit(textos, labels)
+    return modelo
+
+def salvar_modelo_rapido(modelo, caminho):
+    joblib.dump(modelo, caminho)
+
+def carregar_modelo_rapido(caminho):
+    return joblib.load(caminho)
+
+def prever_com_confianca(modelo, textos):
+    """Retorna (rótulos, confianças) na ordem de textos."""
+    probabilidades = modelo.predict_proba(textos)
+    indices = probabilidades.argmax(axis=1)
+    classes = modelo.classes_
+    return [str(classes[i]) for i in indices], [float(p[i]) for p, i in zip(probabilidades, indices)]
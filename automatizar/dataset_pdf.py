@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from tqdm import tqdm
+from extracao_pdf import hash_arquivo
+
+# Dataset de treino em Parquet, uma linha por PDF (hash do conteúdo) com texto, rótulo,
+# caminho de origem e configuração de OCR. Cada execução grava só os PDFs novos em mais um
+# parte-*.parquet dentro da pasta; para saber o que já existe basta ler a coluna hash.
+# O dataset_classificacao.csv antigo (só texto e label) é copiado uma vez com migrar_csv_legado.
+
+COLUNAS = ["hash", "texto", "label", "caminho", "configuracao_ocr"]
+TAMANHO_PARTE = 200  # registros por arquivo; uma queda no meio perde no máximo isso
+PREFIXO_HASH_TEXTO = "texto:"  # registros vindos do CSV, sem o PDF de origem
+ARQUIVO_PULADOS = "hashes_pulados.txt"  # PDFs lidos que não viraram registro (sem rótulo, texto repetido)
+
+def configuracao_ocr(tesseract_config, tesseract_lang, dpi, preprocessar):
+    """Mesmos campos que o extracao_pdf usa na chave do cache de OCR."""
+    nome_preprocessamento = None
+    if preprocessar:
+        nome_preprocessamento = getattr(preprocessar, "assinatura", None) or getattr(preprocessar, "__name__", None)
+    return json.dumps([tesseract_config, tesseract_lang, dpi, nome_preprocessamento])
+
+def listar_partes(pasta_dataset):
+    if not os.path.isdir(pasta_dataset):
+        return []
+    # Nome tem o horário em ns, então a ordem alfabética é a ordem de gravação
+    return sorted(os.path.join(pasta_dataset, f) for f in os.listdir(pasta_dataset) if f.endswith(".parquet"))
+
+def ler_dataset(pasta_dataset, colunas=None):
+    """DataFrame com todas as partes, na ordem em que foram gravadas."""
+    partes = listar_partes(pasta_dataset)
+    if not partes:
+        return pd.DataFrame(columns=colunas or COLUNAS)
+    return pd.concat([pd.read_parquet(parte, columns=colunas) for parte in partes], ignore_index=True)
+
+def hashes_existentes(pasta_dataset):
+    """Hashes do dataset e dos PDFs já pulados: nenhum deles é extraído de novo."""
+    conhecidos = set(ler_dataset(pasta_dataset, ["hash"])["hash"])
+    caminho = os.path.join(pasta_dataset, ARQUIVO_PULADOS)
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            conhecidos.update(linha.strip() for linha in f if linha.strip())
+    return conhecidos
+
+def registrar_pulados(pasta_dataset, hashes):
+    if not hashes:
+        return
+    os.makedirs(pasta_dataset, exist_ok=True)
+    with open(os.path.join(pasta_dataset, ARQUIVO_PULADOS), "a", encoding="utf-8") as f:
+        f.writelines(f"{hash_pdf}\n" for hash_pdf in hashes)
+
+def gravar_parte(pasta_dataset, registros):
+    os.makedirs(pasta_dataset, exist_ok=True)
+    nome = f"parte-{time.time_ns()}.parquet"
+    temporario = os.path.join(pasta_dataset, nome + ".tmp")
+    pd.DataFrame(registros, columns=COLUNAS).to_parquet(temporario, index=False)
+    os.replace(temporario, os.path.join(pasta_dataset, nome))
+
+def hash_texto(texto):
+    """Chave dos registros migrados do CSV: como o PDF não é conhecido, o hash é do texto."""
+    return PREFIXO_HASH_TEXTO + hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+def migrar_csv_legado(caminho_csv, pasta_dataset):
+    """
+    Copia as linhas do CSV antigo (colunas texto, label) para o dataset e renomeia o CSV
+    para .migrado, então só roda uma vez. Textos repetidos entram uma vez só.
+    Retorna quantos registros foram gravados.
+    """
+    if not os.path.exists(caminho_csv):
+        return 0
+    df = pd.read_csv(caminho_csv).dropna(subset=["label"])
+    conhecidos = hashes_existentes(pasta_dataset)
+
+    registros = []
+    for texto, label in zip(df["texto"].fillna(""), df["label"]):
+        chave = hash_texto(texto)
+        if chave in conhecidos:
+            continue
+        conhecidos.add(chave)
+        registros.append({"hash": chave, "texto": texto, "label": label,
+                          "caminho": None, "configuracao_ocr": None})
+    for inicio in range(0, len(registros), TAMANHO_PARTE):
+        gravar_parte(pasta_dataset, registros[inicio:inicio + TAMANHO_PARTE])
+
+    os.replace(caminho_csv, caminho_csv + ".migrado")
+    print(f"📦 {len(registros)} registros de {caminho_csv} migrados para {pasta_dataset} (CSV renomeado para .migrado)")
+    return len(registros)
+
+def listar_pdfs(pasta_base):
+    for pasta_raiz, _, arquivos in os.walk(pasta_base):
+        for arq in sorted(arquivos):
+            if arq.lower().endswith(".pdf"):
+                yield os.path.join(pasta_raiz, arq)
+
+def extrair_registro(extrair_texto, caminho):
+    """Roda no worker; o erro volta junto com o resultado, então um PDF corrompido não derruba o resto."""
+    try:
+        return caminho, extrair_texto(caminho), None, os.getpid()
+    except Exception as e:
+        return caminho, None, f"{type(e).__name__}: {e}", os.getpid()
+
+def extrair_em_paralelo(extrair_texto, caminhos, workers):
+    """Gera (caminho, texto, erro, worker) na ordem em que as extrações terminam."""
+    if workers <= 1:
+        for caminho in caminhos:
+            yield extrair_registro(extrair_texto, caminho)
+        return
+
+    # Cada worker já é um processo: o tesseract não precisa abrir várias threads também
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = {executor.submit(extrair_registro, extrair_texto, caminho): caminho for caminho in caminhos}
+        for futuro in as_completed(futuros):
+            try:
+                yield futuro.result()
+            except Exception as e:  # worker morreu (ex.: BrokenProcessPool)
+                yield futuros[futuro], None, f"{type(e).__name__}: {e}", "pool"
+
+def resumo_workers(processados, erros):
+    print("\n📊 Resumo por worker:")
+    for worker in sorted(processados, key=str):
+        print(f"   worker {worker}: {processados[worker]} PDFs, {len(erros.get(worker, []))} erros")
+        for caminho, erro in erros.get(worker, []):
+            print(f"      ❌ {caminho}: {erro}")
+
+def atualizar_dataset(pasta_base, pasta_dataset, extrair_texto, rotular, configuracao, aceitar=None, workers=1):
+    """
+    Acrescenta ao dataset os PDFs de pasta_base cujo hash ainda não está nele.
+    extrair_texto(caminho) -> texto; rotular(caminho, texto) -> rótulo (None descarta e guarda
+    o hash em ARQUIVO_PULADOS); aceitar(caminho) filtra antes do hash e do OCR. Com workers > 1 a extração roda em
+    processos separados (extrair_texto precisa ser uma função de módulo) e os registros
+    são gravados conforme ficam prontos. Retorna quantos registros foram gravados.
+    """
+    conhecidos = hashes_existentes(pasta_dataset)
+    pdfs = [caminho for caminho in listar_pdfs(pasta_base) if aceitar is None or aceitar(caminho)]
+    barra = tqdm(total=len(pdfs), desc="Lendo PDFs")
+    processados = {}
+    erros = {}
+
+    pendentes = {}  # caminho -> hash
+    for caminho in pdfs:
+        try:
+            hash_pdf = hash_arquivo(caminho)
+        except OSError as e:
+            erros.setdefault("principal", []).append((caminho, str(e)))
+            processados["principal"] = processados.get("principal", 0) + 1
+            barra.update()
+            continue
+        if hash_pdf in conhecidos:
+            barra.update()
+            continue
+        conhecidos.add(hash_pdf)  # cópias do mesmo PDF na mesma execução também são puladas
+        pendentes[caminho] = hash_pdf
+
+    registros = []
+    pulados = []
+    gravados = 0
+    for caminho, texto, erro, worker in extrair_em_paralelo(extrair_texto, list(pendentes), workers):
+        barra.update()
+        processados[worker] = processados.get(worker, 0) + 1
+        if erro:
+            erros.setdefault(worker, []).append((caminho, erro))
+            continue
+
+        # Sem rótulo ou com o texto de um registro migrado do CSV: não entra, mas o hash
+        # fica guardado para o PDF não ser extraído de novo na próxima execução
+        label = None if hash_texto(texto) in conhecidos else rotular(caminho, texto)
+        if label is None:
+            pulados.append(pendentes[caminho])
+            continue
+        registros.append({"hash": pendentes[caminho], "texto": texto, "label": label,
+                          "caminho": caminho, "configuracao_ocr": configuracao})
+        if len(registros) >= TAMANHO_PARTE:
+            gravar_parte(pasta_dataset, registros)
+            registrar_pulados(pasta_dataset, pulados)
+            gravados += len(registros)
+            registros, pulados = [], []
+    barra.close()
+
+    if registros:
+        gravar_parte(pasta_dataset, registros)
+        gravados += len(registros)
+    registrar_pulados(pasta_dataset, pulados)
+    if workers > 1 or erros:
+        resumo_workers(processados, erros)
+    return gravados
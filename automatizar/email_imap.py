@@ -3,6 +3,16 @@ import email
 import datetime
 import os
 import re
+import io
+import binascii
+import quopri
+import shutil
+import json
+import tempfile
+import threading
+import time
+import argparse
+from imap_estrutura import ler_fetch, por_uid, buscar_item, listar_partes, conjunto_uids
 
 #  Gmail
 IMAP_SERVER = "imap.gmail.com"
@@ -18,10 +28,30 @@ KEYWORDS = ["boleto",
             #"fatura"
             ]
 
+# Estratégias de busca no servidor (ver ESTRATEGIAS_BUSCA), combinadas com AND.
+# Use --avaliar-busca para ver quantos candidatos cada uma traz e quantos têm anexo.
+ESTRATEGIA_BUSCA = ["corpo"]
+GMAIL_RAW = "has:attachment (filename:pdf OR filename:xml)"  # sintaxe de busca do Gmail (X-GM-RAW)
+REMETENTES_PERMITIDOS = [
+    # "cobranca@banco.com.br",
+    # "@prefeitura.sp.gov.br",
+]
+
+# Baixar só as partes de anexo (BODYSTRUCTURE + BODY.PEEK[n]) em vez do e-mail inteiro
+SOMENTE_ANEXOS = True
+EXTENSOES_ANEXO = (".pdf", ".xml")
+TAMANHO_LOTE = 50  # UIDs por comando FETCH
+TAMANHO_BLOCO = 64 * 1024  # bytes codificados decodificados por vez ao gravar um anexo
+
 # Pasta onde salvar anexos
 SAVE_FOLDER = "automatizar/BOLETOS"
 os.makedirs(SAVE_FOLDER, exist_ok=True)
 
+# Sincronização incremental: UIDVALIDITY e maior UID já processado por conta/pasta
+PASTA_IMAP = "inbox"
+CHECKPOINT_IMAP = "automatizar/checkpoint_imap.json"
+TRAVA_CHECKPOINT = threading.Lock()  # várias contas podem sincronizar ao mesmo tempo
+
 def sanitize_filename(name):
     # remover caracteres especiais e substituir espaços por underline
     name = re.sub(r'[\\/*?:"<>|]', "_", name)
@@ -30,56 +60,425 @@ def sanitize_filename(name):
 def connect_gmail():
     mail = imaplib.IMAP4_SSL(IMAP_SERVER)
     mail.login(EMAIL_ACCOUNT, EMAIL_PASSWORD)
-    mail.select("inbox")
+    # readonly (EXAMINE): nenhum FETCH marca o e-mail como lido (\Seen)
+    mail.select(PASTA_IMAP, readonly=True)
     return mail
 
-def search_emails(mail):
-    search_query = ' OR '.join([f'(BODY "{k}")' for k in KEYWORDS])
-    status, data = mail.search('UTF-8', f'(SENTSINCE {DT_EMAIL})', f'({search_query})')
+# --- Estratégias de busca ---
+
+def ou(criterios):
+    """OR do IMAP é prefixado e binário: [a, b, c] -> "OR a OR b c"."""
+    if len(criterios) == 1:
+        return criterios[0]
+    return f"OR {criterios[0]} {ou(criterios[1:])}"
+
+def busca_corpo():
+    # Busca de texto no corpo: o servidor varre as mensagens e traz muitas sem anexo
+    criterios = [f'BODY "{k}"' for k in KEYWORDS]
+    return f"({ou(criterios)})"
+
+def busca_gmail():
+    # Só Gmail: filtra por anexo e nome do arquivo no próprio servidor
+    return f'X-GM-RAW "{GMAIL_RAW}"'
+
+def busca_assunto():
+    criterios = [f'SUBJECT "{k}"' for k in KEYWORDS]
+    return f"({ou(criterios)})"
+
+def busca_multipart():
+    # E-mails com anexo quase sempre são multipart/mixed
+    return 'HEADER Content-Type "multipart/mixed"'
+
+def busca_remetentes():
+    if not REMETENTES_PERMITIDOS:
+        return None
+    criterios = [f'FROM "{r}"' for r in REMETENTES_PERMITIDOS]
+    return f"({ou(criterios)})"
+
+ESTRATEGIAS_BUSCA = {
+    "corpo": busca_corpo,
+    "gmail": busca_gmail,
+    "assunto": busca_assunto,
+    "multipart": busca_multipart,
+    "remetentes": busca_remetentes
+}
+
+def criterios_busca(estrategia=None):
+    """Critérios de SEARCH das estratégias (nome ou lista de nomes; None = ESTRATEGIA_BUSCA)."""
+    nomes = ESTRATEGIA_BUSCA if estrategia is None else estrategia
+    if isinstance(nomes, str):
+        nomes = [nomes]
+    criterios = [ESTRATEGIAS_BUSCA[nome]() for nome in nomes]
+    return [criterio for criterio in criterios if criterio]
+
+def search_emails(mail, estrategia=None):
+    """Busca completa na janela de DT_EMAIL. Retorna UIDs."""
+    status, data = mail.uid('SEARCH', 'CHARSET', 'UTF-8', f'(SENTSINCE {DT_EMAIL})', *criterios_busca(estrategia))
     if status != "OK":
         print("Nenhum e-mail encontrado.")
         return []
     return data[0].split()
 
-def download_attachments(mail, email_ids):
-    for e_id in email_ids:
-        status, data = mail.fetch(e_id, "(RFC822)")
+# --- Checkpoint da sincronização incremental ---
+
+def carregar_checkpoint(caminho=CHECKPOINT_IMAP):
+    """{"conta/pasta": {"uidvalidity": n, "ultimo_uid": n}}"""
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        print(f"⚠️ Checkpoint ilegível, fazendo sincronização completa: {caminho}")
+        return {}
+
+def salvar_checkpoint(checkpoint, caminho=CHECKPOINT_IMAP):
+    # Grava num temporário e troca, para não deixar o checkpoint pela metade
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+def ler_status_pasta(mail, pasta=PASTA_IMAP):
+    """(UIDVALIDITY, UIDNEXT) da pasta; None no que o servidor não devolver."""
+    status, data = mail.status(pasta, "(UIDVALIDITY UIDNEXT)")
+    if status != "OK":
+        return None, None
+    valores = []
+    for item in (rb"UIDVALIDITY (\d+)", rb"UIDNEXT (\d+)"):
+        encontrado = re.search(item, data[0])
+        valores.append(int(encontrado.group(1)) if encontrado else None)
+    return tuple(valores)
+
+def search_emails_incremental(mail, estado, estrategia=None):
+    """
+    Só os UIDs maiores que o último processado.
+    "n:*" sempre devolve ao menos o maior UID da pasta, por isso o filtro no final.
+    Sem ponto de partida (ultimo_uid 0) a janela de DT_EMAIL continua valendo,
+    para não varrer a caixa inteira.
+    """
+    ultimo_uid = estado["ultimo_uid"]
+    criterios = [f'UID {ultimo_uid + 1}:*'] + criterios_busca(estrategia)
+    if ultimo_uid == 0:
+        criterios.insert(0, f'(SENTSINCE {DT_EMAIL})')
+    status, data = mail.uid('SEARCH', 'CHARSET', 'UTF-8', *criterios)
+    if status != "OK":
+        print("Nenhum e-mail encontrado.")
+        return []
+    return [uid for uid in data[0].split() if int(uid) > ultimo_uid]
+
+def nome_base(msg):
+    """Remetente e data do e-mail, usados no nome do anexo salvo."""
+    remetente = sanitize_filename(msg["From"] or "") or "remetente_desconhecido"
+    data_email = msg["Date"] or "data_desconhecida"
+
+    try:
+        data_formatada = datetime.datetime.strptime(data_email[:25], "%a, %d %b %Y %H:%M:%S").strftime("%Y-%m-%d")
+    except:
+        data_formatada = datetime.datetime.now().strftime("%Y-%m-%d")
+    return remetente, data_formatada
+
+# --- Gravação dos anexos ---
+
+RE_NOME_SALVO = re.compile(r"^(?P<base>.*?)(?: \((?P<contador>\d+)\))?(?P<ext>\.[^.]*)$")
+SUFIXOS = {}  # pasta -> {(base, ext): próximo contador livre}
+TRAVA_SUFIXOS = threading.Lock()
+
+def indexar_sufixos(pasta):
+    """Lê a pasta uma vez e guarda o próximo contador livre de cada "remetente - data"."""
+    indice = {}
+    for entrada in os.scandir(pasta):
+        encontrado = RE_NOME_SALVO.match(entrada.name)
+        if encontrado:
+            chave = (encontrado['base'], encontrado['ext'])
+            indice[chave] = max(indice.get(chave, 1), int(encontrado['contador'] or 1) + 1)
+    return indice
+
+def reservar_nome(pasta, base, ext):
+    """Próximo nome livre em O(1), sem um os.path.exists por tentativa."""
+    with TRAVA_SUFIXOS:
+        if pasta not in SUFIXOS:
+            SUFIXOS[pasta] = indexar_sufixos(pasta)
+        indice = SUFIXOS[pasta]
+        contador = indice.get((base, ext), 1)
+        indice[(base, ext)] = contador + 1
+    return f"{base}{ext}" if contador == 1 else f"{base} ({contador}){ext}"
+
+def escrever_decodificado(arquivo, conteudo, codificacao=None):
+    """Decodifica a parte em blocos direto no arquivo, sem montar o anexo inteiro na memória."""
+    if codificacao == "base64":
+        resto = b""
+        for inicio in range(0, len(conteudo), TAMANHO_BLOCO):
+            bloco = resto + conteudo[inicio:inicio + TAMANHO_BLOCO].translate(None, b" \t\r\n")
+            corte = len(bloco) - len(bloco) % 4
+            arquivo.write(binascii.a2b_base64(bloco[:corte]))
+            resto = bloco[corte:]
+        if resto.rstrip(b"="):
+            arquivo.write(binascii.a2b_base64(resto + b"=" * (-len(resto) % 4)))
+    elif codificacao == "quoted-printable":
+        quopri.decode(io.BytesIO(conteudo), arquivo)
+    else:
+        arquivo.write(conteudo)
+
+def publicar(temporario, filepath):
+    """Põe o arquivo pronto no nome final sem sobrescrever nada (FileExistsError se já existe)."""
+    try:
+        os.link(temporario, filepath)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Sistema de arquivos sem hard link: criação exclusiva e cópia
+        with open(temporario, "rb") as origem, open(filepath, "xb") as final:
+            shutil.copyfileobj(origem, final)
+
+def salvar_anexo(remetente, data_formatada, filename, conteudo, codificacao=None):
+    """
+    Grava num temporário da própria pasta e só então publica com o nome final,
+    então nunca aparece anexo pela metade em SAVE_FOLDER.
+    codificacao: "base64"/"quoted-printable" se conteudo ainda está codificado.
+    """
+    ext = os.path.splitext(filename)[1]
+    base = f"{remetente} - {data_formatada}"
+    fd, temporario = tempfile.mkstemp(dir=SAVE_FOLDER, suffix=".parcial")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            escrever_decodificado(f, conteudo, codificacao)
+        while True:
+            filepath = os.path.join(SAVE_FOLDER, reservar_nome(SAVE_FOLDER, base, ext))
+            try:
+                publicar(temporario, filepath)
+                break
+            except FileExistsError:
+                continue  # criado por fora depois da indexação; tenta o próximo
+    finally:
+        os.remove(temporario)
+    print(f"📂 Anexo salvo: {filepath}")
+    return filepath
+
+def eh_anexo(nome, disposicao):
+    return disposicao == "attachment" and bool(nome) and nome.lower().endswith(EXTENSOES_ANEXO)
+
+def lotes(email_ids, tamanho_lote=TAMANHO_LOTE):
+    for inicio in range(0, len(email_ids), tamanho_lote):
+        yield email_ids[inicio:inicio + tamanho_lote]
+
+def download_attachments_completo(mail, email_ids, tamanho_lote=TAMANHO_LOTE, destino=salvar_anexo):
+    """Modo antigo: baixa o e-mail inteiro (RFC822) e procura os anexos nele."""
+    processados = []
+    for lote in lotes(email_ids, tamanho_lote):
+        status, data = mail.uid("FETCH", conjunto_uids(lote), "(UID RFC822)")
+        if status != "OK":
+            print(f"Erro ao buscar e-mails {conjunto_uids(lote)}")
+            continue
+
+        mensagens = por_uid(ler_fetch(data))
+        for e_id in lote:
+            bruto = mensagens.get(int(e_id), {}).get("RFC822")
+            if bruto is None:
+                print(f"Erro ao buscar e-mail {e_id}")
+                continue
+
+            msg = email.message_from_bytes(bruto)
+            remetente, data_formatada = nome_base(msg)
+
+            try:
+                for part in msg.walk():
+                    filename = part.get_filename()
+                    if eh_anexo(filename, part.get_content_disposition()):
+                        codificacao = (part["Content-Transfer-Encoding"] or "7bit").strip().lower()
+                        if codificacao in ("base64", "quoted-printable"):
+                            destino(remetente, data_formatada, filename, part.get_payload().encode("ascii", "replace"), codificacao)
+                        else:
+                            destino(remetente, data_formatada, filename, part.get_payload(decode=True))
+            except Exception as e:
+                # Anexo não gravado: o UID fica fora de processados e o checkpoint para antes dele
+                print(f"❌ Erro ao salvar anexo do e-mail {e_id}: {e}")
+                continue
+            processados.append(e_id)
+    return processados
+
+def salvar_anexos_mensagem(e_id, remetente, data_formatada, anexos, conteudos, destino=salvar_anexo):
+    """Salva as partes de um e-mail; False se alguma não veio na resposta."""
+    completo = True
+    for parte in anexos:
+        conteudo = conteudos.get(f"BODY[{parte['numero']}]")
+        if conteudo is None:
+            print(f"⚠️ Parte {parte['numero']} do e-mail {e_id} não veio na resposta.")
+            completo = False
+            continue
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode()
+        destino(remetente, data_formatada, parte['nome'], conteudo, parte['codificacao'])
+    return completo
+
+def download_attachments_estrutura(mail, email_ids, tamanho_lote=TAMANHO_LOTE, destino=salvar_anexo):
+    """
+    Baixa só os anexos: primeiro BODYSTRUCTURE e os cabeçalhos From/Date,
+    depois apenas as seções dos anexos .pdf/.xml com BODY.PEEK[n].
+    PEEK não marca \\Seen, então o e-mail continua como não lido.
+    Cada FETCH leva um lote de UIDs (ex.: "3:7,12"), então são ~2 idas e voltas
+    ao servidor por lote em vez de 2 por e-mail.
+    """
+    processados = []
+    for lote in lotes(email_ids, tamanho_lote):
+        status, data = mail.uid("FETCH", conjunto_uids(lote), "(UID BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (FROM DATE)])")
         if status != "OK":
-            print(f"Erro ao buscar e-mail {e_id}")
+            print(f"Erro ao buscar e-mails {conjunto_uids(lote)}")
             continue
 
-        msg = email.message_from_bytes(data[0][1])
+        mensagens = por_uid(ler_fetch(data))
+        pendentes = {}  # e_id -> (remetente, data, anexos)
+        grupos = {}     # seções pedidas -> UIDs, para buscar juntos os e-mails com o mesmo formato
+        for e_id in lote:
+            campos = mensagens.get(int(e_id))
+            if campos is None:
+                print(f"Erro ao buscar e-mail {e_id}")
+                continue
+
+            estrutura = campos.get("BODYSTRUCTURE")
+            if not estrutura:
+                print(f"⚠️ E-mail {e_id} sem BODYSTRUCTURE, baixando completo.")
+                processados += download_attachments_completo(mail, [e_id], destino=destino)
+                continue
+
+            anexos = [parte for parte in listar_partes(estrutura) if eh_anexo(parte['nome'], parte['disposicao'])]
+            if not anexos:
+                processados.append(e_id)
+                continue
+
+            cabecalho = buscar_item(campos, "BODY[HEADER") or b""
+            if isinstance(cabecalho, str):
+                cabecalho = cabecalho.encode()
+            remetente, data_formatada = nome_base(email.message_from_bytes(cabecalho))
+            pendentes[e_id] = (remetente, data_formatada, anexos)
+            grupos.setdefault(tuple(parte['numero'] for parte in anexos), []).append(e_id)
 
-        # Pegar remetente e data
-        remetente = sanitize_filename(msg["From"]) or "remetente_desconhecido"
-        data_email = msg["Date"] or "data_desconhecida"
+        conteudos = {}
+        for numeros, uids in grupos.items():
+            secoes = " ".join(f"BODY.PEEK[{numero}]" for numero in numeros)
+            status, data = mail.uid("FETCH", conjunto_uids(uids), f"(UID {secoes})")
+            if status != "OK":
+                print(f"Erro ao buscar anexos dos e-mails {conjunto_uids(uids)}")
+                continue
+            conteudos.update(por_uid(ler_fetch(data)))
 
+        # Salva na ordem dos UIDs, como no modo de um e-mail por vez
+        for e_id, (remetente, data_formatada, anexos) in pendentes.items():
+            if int(e_id) not in conteudos:
+                print(f"Erro ao buscar anexos do e-mail {e_id}")
+                continue
+            try:
+                completo = salvar_anexos_mensagem(e_id, remetente, data_formatada, anexos, conteudos[int(e_id)], destino)
+            except Exception as e:
+                print(f"❌ Erro ao salvar anexo do e-mail {e_id}: {e}")
+                continue
+            if completo:
+                processados.append(e_id)
+    return processados
+
+def download_attachments(mail, email_ids, somente_anexos=SOMENTE_ANEXOS, tamanho_lote=TAMANHO_LOTE, destino=salvar_anexo):
+    """
+    Retorna os UIDs processados sem erro.
+    destino(remetente, data_formatada, nome, conteudo, codificacao=None) recebe cada anexo
+    (padrão: salvar em SAVE_FOLDER). Se destino levantar exceção, o e-mail não conta como processado.
+    """
+    if somente_anexos:
+        return download_attachments_estrutura(mail, email_ids, tamanho_lote, destino)
+    return download_attachments_completo(mail, email_ids, tamanho_lote, destino)
+
+def sincronizar(mail, pasta=PASTA_IMAP, caminho_checkpoint=CHECKPOINT_IMAP, conta=EMAIL_ACCOUNT, destino=salvar_anexo,
+                estrategia=None):
+    """
+    Sincronização incremental: baixa só os UIDs novos desde a última execução.
+    Se o UIDVALIDITY da pasta mudou (ou não há checkpoint), refaz a busca completa.
+    """
+    checkpoint = carregar_checkpoint(caminho_checkpoint)
+    chave = f"{conta}/{pasta}"
+    uidvalidity, uidnext = ler_status_pasta(mail, pasta)
+    estado = checkpoint.get(chave)
+
+    if estado and uidvalidity is not None and estado.get("uidvalidity") == uidvalidity:
+        uids = search_emails_incremental(mail, estado, estrategia)
+        print(f"📧 {len(uids)} e-mails novos desde o UID {estado['ultimo_uid']}.")
+    else:
+        if estado:
+            print(f"♻️ UIDVALIDITY de {chave} mudou, sincronização completa.")
+        # A busca completa cobre a janela de DT_EMAIL; o que é mais antigo que UIDNEXT e ficou
+        # fora dela não deve ser baixado depois, então o ponto de partida é UIDNEXT - 1
+        estado = {"uidvalidity": uidvalidity, "ultimo_uid": uidnext - 1 if uidnext else 0}
+        uids = search_emails(mail, estrategia)
+        print(f"📧 {len(uids)} e-mails encontrados com palavras-chave.")
+
+    uids = sorted(uids, key=int)
+    processados = set(download_attachments(mail, uids, destino=destino))
+
+    # Avança até o primeiro UID com erro, para ele ser tentado de novo na próxima vez
+    for uid in uids:
+        if uid not in processados:
+            estado["ultimo_uid"] = min(estado["ultimo_uid"], int(uid) - 1)
+            print(f"⚠️ UID {uid.decode()} com erro, checkpoint parado no UID {estado['ultimo_uid']}.")
+            break
+        estado["ultimo_uid"] = max(estado["ultimo_uid"], int(uid))
+
+    # Relê o arquivo antes de gravar: outra conta pode ter salvo o dela nesse meio tempo
+    with TRAVA_CHECKPOINT:
+        checkpoint = carregar_checkpoint(caminho_checkpoint)
+        checkpoint[chave] = estado
+        salvar_checkpoint(checkpoint, caminho_checkpoint)
+    return uids
+
+# --- Comparação das estratégias de busca ---
+
+def contar_com_anexo(mail, email_ids, tamanho_lote=TAMANHO_LOTE):
+    """Quantos dos e-mails têm ao menos um anexo .pdf/.xml (só BODYSTRUCTURE, sem baixar nada)."""
+    com_anexo = 0
+    for lote in lotes(email_ids, tamanho_lote):
+        status, data = mail.uid("FETCH", conjunto_uids(lote), "(UID BODYSTRUCTURE)")
+        if status != "OK":
+            continue
+        for campos in por_uid(ler_fetch(data)).values():
+            estrutura = campos.get("BODYSTRUCTURE")
+            if estrutura and any(eh_anexo(parte['nome'], parte['disposicao']) for parte in listar_partes(estrutura)):
+                com_anexo += 1
+    return com_anexo
+
+def avaliar_estrategias(mail, nomes=None):
+    """
+    Roda cada estratégia na janela de DT_EMAIL e mostra candidatos, quantos têm anexo
+    e o tempo da busca, para escolher a consulta mais barata de cada provedor.
+    """
+    estatisticas = {}
+    print(f"{'estratégia':>12} {'candidatos':>11} {'com anexo':>10} {'aproveitamento':>15} {'busca (s)':>10}")
+    for nome in nomes or ESTRATEGIAS_BUSCA:
+        if not criterios_busca(nome):
+            print(f"{nome:>12} {'(sem critérios configurados)':>50}")
+            continue
+        inicio = time.perf_counter()
         try:
-            data_formatada = datetime.datetime.strptime(data_email[:25], "%a, %d %b %Y %H:%M:%S").strftime("%Y-%m-%d")
-        except:
-            data_formatada = datetime.datetime.now().strftime("%Y-%m-%d")
-
-        for part in msg.walk():
-            if part.get_content_disposition() == "attachment":
-                filename = part.get_filename()
-                if filename and (filename.lower().endswith(".pdf") or filename.lower().endswith(".xml")):
-                    ext = os.path.splitext(filename)[1]
-                    novo_nome = f"{remetente} - {data_formatada}{ext}"
-                    filepath = os.path.join(SAVE_FOLDER, novo_nome)
-
-                    contador = 1
-                    while os.path.exists(filepath):
-                        contador += 1
-                        novo_nome = f"{remetente} - {data_formatada} ({contador}){ext}"
-                        filepath = os.path.join(SAVE_FOLDER, novo_nome)
-
-                    with open(filepath, "wb") as f:
-                        f.write(part.get_payload(decode=True))
-                    print(f"📂 Anexo salvo: {filepath}")
+            uids = search_emails(mail, nome)
+        except imaplib.IMAP4.error as e:
+            print(f"{nome:>12} ⚠️ não suportada por este servidor: {e}")
+            continue
+        tempo = time.perf_counter() - inicio
+        com_anexo = contar_com_anexo(mail, uids)
+        aproveitamento = com_anexo / len(uids) if uids else 0
+        estatisticas[nome] = {'candidatos': len(uids), 'com_anexo': com_anexo, 'tempo_busca': tempo}
+        print(f"{nome:>12} {len(uids):>11} {com_anexo:>10} {aproveitamento:>15.0%} {tempo:>10.2f}")
+    return estatisticas
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baixa os anexos de boletos/notas do e-mail.")
+    parser.add_argument("--avaliar-busca", action="store_true",
+                        help="compara as estratégias de busca em vez de baixar os anexos")
+    parser.add_argument("--busca", nargs="+", choices=list(ESTRATEGIAS_BUSCA), default=None,
+                        help="estratégias de busca a usar (padrão: ESTRATEGIA_BUSCA)")
+    args = parser.parse_args()
+
     mail = connect_gmail()
-    emails = search_emails(mail)
-    print(f"📧 {len(emails)} e-mails encontrados com palavras-chave.")
-    download_attachments(mail, emails)
+    if args.avaliar_busca:
+        avaliar_estrategias(mail, args.busca)
+    else:
+        sincronizar(mail, estrategia=args.busca)
     mail.logout()
@@ -0,0 +1,71 @@
+import re
+
+# Motor de extração de campos por regex, compilado uma vez por dicionário de campos
+# (CAMPOS_BOLETO / CAMPOS_NF). Todos os rótulos são achados numa única passada pelo
+# texto e o valor de cada um só é procurado numa janela limitada logo depois do rótulo,
+# então o tempo cresce de forma linear com o tamanho do texto do OCR.
+
+JANELA_PADRAO = 300  # caracteres depois do rótulo onde o valor pode começar
+FOLGA_VALOR = 40     # espaço extra para o valor terminar além da janela
+
+def compilar_campos(campos, janela=JANELA_PADRAO, max_palavras=None):
+    """
+    Compila {rótulo: regex do valor} num motor reutilizável.
+    max_palavras limita quantas palavras podem ficar entre o rótulo e o valor
+    (None = qualquer posição dentro da janela).
+    """
+    chaves = list(campos)
+    # Rótulos mais longos primeiro, para não perder "Data e Hora de Emissão" para um prefixo
+    ordem = sorted(range(len(chaves)), key=lambda i: len(chaves[i]), reverse=True)
+    rotulos = re.compile(
+        "|".join(f"(?P<c{i}>{re.escape(chaves[i])})" for i in ordem),
+        re.IGNORECASE
+    )
+
+    valores = {}
+    for chave, padrao_base in campos.items():
+        if max_palavras is None:
+            valores[chave] = re.compile(f"({padrao_base})", re.IGNORECASE)
+        else:
+            valores[chave] = re.compile(rf"(?:\s+\S+){{0,{max_palavras}}}?\s+({padrao_base})", re.IGNORECASE)
+
+    return {
+        'chaves': chaves,
+        'rotulos': rotulos,
+        'valores': valores,
+        'janela': janela,
+        'ancorado': max_palavras is not None
+    }
+
+def extrair_campos(texto_continuo, motor):
+    """
+    Retorna {rótulo: valor} para cada rótulo presente no texto;
+    valor é None se o rótulo aparece mas nenhum valor foi achado depois dele.
+    """
+    encontrados = {}
+    pendentes = len(motor['chaves'])
+    janela = motor['janela']
+
+    for rotulo in motor['rotulos'].finditer(texto_continuo):
+        chave = motor['chaves'][int(rotulo.lastgroup[1:])]
+        if encontrados.get(chave):
+            continue
+
+        inicio = rotulo.end()
+        limite = min(len(texto_continuo), inicio + janela + FOLGA_VALOR)
+        if motor['ancorado']:
+            valor = motor['valores'][chave].match(texto_continuo, inicio, limite)
+        else:
+            valor = motor['valores'][chave].search(texto_continuo, inicio, limite)
+            if valor and valor.start(1) > inicio + janela:
+                valor = None
+
+        if valor:
+            encontrados[chave] = valor.group(1)
+            pendentes -= 1
+            if pendentes == 0:
+                break
+        else:
+            encontrados.setdefault(chave, None)
+
+    return encontrados
@@ -0,0 +1,201 @@
+import re
+from urllib.parse import unquote
+from email.header import decode_header, make_header
+
+# Leitura das respostas do imaplib (FETCH) e do BODYSTRUCTURE, para baixar
+# só as partes de anexo de cada e-mail em vez da mensagem inteira (RFC822).
+
+RE_LITERAL = re.compile(rb"\{(\d+)\}\s*$")
+RE_ATOMO = re.compile(rb'[^\s()"\[\]{]+')
+
+# -------------------------
+# TOKENS E LISTAS
+# -------------------------
+def tokenizar_texto(texto):
+    """Tokens de um trecho de resposta: '(', ')', strings/átomos (str) e NIL (None)."""
+    i, tamanho = 0, len(texto)
+    while i < tamanho:
+        c = texto[i:i + 1]
+        if c in b" \r\n\t":
+            i += 1
+        elif c in b"()":
+            yield c.decode()
+            i += 1
+        elif c == b'"':
+            fim = i + 1
+            valor = bytearray()
+            # fim < tamanho: uma string sem aspas de fechamento termina no fim do trecho
+            while fim < tamanho and texto[fim:fim + 1] != b'"':
+                if texto[fim:fim + 1] == b"\\" and fim + 1 < tamanho:
+                    fim += 1
+                valor += texto[fim:fim + 1]
+                fim += 1
+            yield valor.decode("utf-8", errors="replace")
+            i = fim + 1
+        else:
+            # Átomo, incluindo seções como BODY[HEADER.FIELDS (FROM DATE)]<0>
+            atomo = RE_ATOMO.match(texto, i)
+            fim = atomo.end() if atomo else i
+            if texto[fim:fim + 1] == b"[":
+                fim = texto.index(b"]", fim) + 1
+                if texto[fim:fim + 1] == b"<":
+                    fim = texto.index(b">", fim) + 1
+            if fim == i:
+                fim = i + 1  # caractere solto, ignora
+                i = fim
+                continue
+            valor = texto[i:fim].decode("utf-8", errors="replace")
+            yield None if valor.upper() == "NIL" else valor
+            i = fim
+
+def tokenizar_resposta(dados):
+    """
+    Tokens de uma resposta do imaplib: itens bytes são texto e tuplas são
+    (texto terminado em {n}, literal). Literais voltam como bytes.
+    """
+    for item in dados:
+        if isinstance(item, tuple):
+            prefixo, literal = item
+            yield from tokenizar_texto(RE_LITERAL.sub(b"", prefixo))
+            yield literal
+        elif isinstance(item, bytes):
+            yield from tokenizar_texto(item)
+
+def montar_listas(tokens):
+    """Transforma os tokens em listas aninhadas, seguindo os parênteses."""
+    pilha = [[]]
+    for token in tokens:
+        if token == "(":
+            pilha.append([])
+        elif token == ")":
+            if len(pilha) > 1:
+                fechada = pilha.pop()
+                pilha[-1].append(fechada)
+        else:
+            pilha[-1].append(token)
+    return pilha[0]
+
+def ler_fetch(dados):
+    """
+    Resposta de FETCH -> {número da mensagem: {ITEM: valor}}.
+    Os nomes dos itens vêm em maiúsculas (ex.: 'UID', 'BODYSTRUCTURE', 'BODY[2]').
+    """
+    mensagens = {}
+    elementos = montar_listas(tokenizar_resposta(dados))
+    numero = None
+    for elemento in elementos:
+        if isinstance(elemento, list):
+            if numero is None:
+                continue
+            campos = mensagens.setdefault(numero, {})
+            for chave, valor in zip(elemento[0::2], elemento[1::2]):
+                if isinstance(chave, str):
+                    campos[chave.upper()] = valor
+            numero = None
+        elif isinstance(elemento, str) and elemento.isdigit():
+            numero = elemento
+    return mensagens
+
+def por_uid(mensagens):
+    """Reindexa o resultado de ler_fetch pelo UID (int); requer UID entre os itens pedidos."""
+    return {int(campos["UID"]): campos for campos in mensagens.values() if str(campos.get("UID", "")).isdigit()}
+
+def conjunto_uids(uids):
+    """[3, 4, 5, 9] -> "3:5,9" (conjunto de UIDs para um único UID FETCH)."""
+    numeros = sorted({int(uid) for uid in uids})
+    faixas = []
+    for numero in numeros:
+        if faixas and numero == faixas[-1][1] + 1:
+            faixas[-1][1] = numero
+        else:
+            faixas.append([numero, numero])
+    return ",".join(str(a) if a == b else f"{a}:{b}" for a, b in faixas)
+
+def buscar_item(campos, prefixo):
+    """Primeiro item cujo nome começa com prefixo (o servidor pode reescrever a seção)."""
+    for chave, valor in campos.items():
+        if chave.startswith(prefixo):
+            return valor
+    return None
+
+# -------------------------
+# BODYSTRUCTURE
+# -------------------------
+def texto(valor):
+    if isinstance(valor, bytes):
+        return valor.decode("utf-8", errors="replace")
+    return valor
+
+def parametros(lista):
+    """('NAME' 'x.pdf' 'CHARSET' 'utf-8') -> {'name': 'x.pdf', 'charset': 'utf-8'}"""
+    if not isinstance(lista, list):
+        return {}
+    return {texto(k).lower(): texto(v) for k, v in zip(lista[0::2], lista[1::2]) if k is not None}
+
+def decodificar_nome(params, chave):
+    """Nome do arquivo, tratando RFC 2231 (filename*=) e encoded-words (=?utf-8?...?=)."""
+    if f"{chave}*" in params:
+        valor, charset = params[f"{chave}*"], "utf-8"
+        if valor.count("'") >= 2:
+            charset, _, valor = valor.split("'", 2)
+        try:
+            return unquote(valor, encoding=charset or "utf-8")
+        except LookupError:
+            return unquote(valor)
+    valor = params.get(chave)
+    if valor is None:
+        return None
+    try:
+        return str(make_header(decode_header(valor)))
+    except (UnicodeDecodeError, LookupError):
+        return valor
+
+def listar_partes(estrutura, prefixo=""):
+    """
+    Percorre o BODYSTRUCTURE e gera um dicionário por parte folha com
+    numero (para BODY[n]), tipo, codificacao, tamanho, disposicao e nome.
+    Um message/rfc822 (e-mail encaminhado como anexo) também entra, seguido das partes dele.
+    """
+    if estrutura and isinstance(estrutura[0], list):
+        # multipart: as partes filhas são as listas do começo, depois vem o subtipo
+        posicao = 0
+        for filho in estrutura:
+            if not isinstance(filho, list):
+                break
+            posicao += 1
+            yield from listar_partes(filho, f"{prefixo}{posicao}.")
+        return
+
+    tipo = f"{texto(estrutura[0]) or ''}/{texto(estrutura[1]) or ''}".lower()
+    # Campos básicos vão até o índice 6; text/* tem "linhas" a mais e
+    # message/rfc822 tem envelope, corpo e linhas. Depois vem md5 e a disposição.
+    indice_disposicao = 8
+    if tipo.startswith("text/"):
+        indice_disposicao = 9
+    elif tipo == "message/rfc822":
+        indice_disposicao = 11
+    disposicao = estrutura[indice_disposicao] if len(estrutura) > indice_disposicao else None
+
+    tipo_disposicao, params_disposicao = None, {}
+    if isinstance(disposicao, list) and disposicao:
+        tipo_disposicao = (texto(disposicao[0]) or "").lower()
+        params_disposicao = parametros(disposicao[1] if len(disposicao) > 1 else None)
+
+    params_corpo = parametros(estrutura[2])
+    nome = decodificar_nome(params_disposicao, "filename") or decodificar_nome(params_corpo, "name")
+
+    numero = prefixo[:-1] or "1"
+    yield {
+        'numero': numero,
+        'tipo': tipo,
+        'codificacao': (texto(estrutura[5]) or "7bit").lower(),
+        'tamanho': int(estrutura[6]) if str(estrutura[6]).isdigit() else 0,
+        'disposicao': tipo_disposicao,
+        'nome': nome
+    }
+
+    # O corpo da mensagem encaminhada vem no índice 8: multipart vira n.1, n.2...;
+    # um corpo de parte única é a seção n.1
+    if tipo == "message/rfc822" and len(estrutura) > 8 and isinstance(estrutura[8], list) and estrutura[8]:
+        corpo = estrutura[8]
+        yield from listar_partes(corpo, f"{numero}." if isinstance(corpo[0], list) else f"{numero}.1.")
@@ -0,0 +1,145 @@
+import asyncio
+import imaplib
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+import conectar
+import email_imap
+
+# Serviço de ingestão de e-mails de várias contas ao mesmo tempo.
+# Cada conta usa uma única conexão IMAP (reaproveitada entre as pastas e entre os ciclos)
+# e roda numa thread via asyncio.to_thread, já que o imaplib é bloqueante.
+# Os anexos de todas as contas vão para uma fila única com um só gravador,
+# então os nomes de arquivo não colidem entre contas e a fila cheia segura os downloads.
+# Cada download espera o seu anexo ser gravado: o checkpoint só passa de um e-mail
+# depois que os anexos dele estão no disco.
+# Uso: python automatizar/ingestao_async.py [--intervalo 300]
+
+CONTAS = [
+    {
+        'nome': "gmail",
+        'servidor': conectar.IMAP_SERVER,
+        'conta': conectar.EMAIL_ACCOUNT,
+        'senha': conectar.EMAIL_PASSWORD,
+        'pastas': ["inbox"],
+        'busca': None  # estratégias de email_imap.ESTRATEGIAS_BUSCA (None = ESTRATEGIA_BUSCA)
+    },
+    {
+        'nome': "outlook",
+        'servidor': conectar.IMAP_SERVER_MS,
+        'conta': conectar.EMAIL_ACCOUNT_MS,
+        'senha': conectar.EMAIL_PASSWORD_MS,
+        'pastas': ["inbox"],
+        'busca': None
+    }
+]
+
+MAX_CONTAS_SIMULTANEAS = 4
+TAMANHO_FILA_ANEXOS = 32
+
+# -------------------------
+# CONEXÕES
+# -------------------------
+def obter_conexao(conta, conexoes):
+    """Reaproveita a conexão aberta da conta (testada com NOOP) ou abre uma nova."""
+    mail = conexoes.get(conta['nome'])
+    if mail is not None:
+        try:
+            mail.noop()
+            return mail
+        except (imaplib.IMAP4.error, OSError):
+            conexoes.pop(conta['nome'], None)
+
+    mail = imaplib.IMAP4_SSL(conta['servidor'])
+    mail.login(conta['conta'], conta['senha'])
+    conexoes[conta['nome']] = mail
+    return mail
+
+def fechar_conexoes(conexoes):
+    for mail in conexoes.values():
+        try:
+            mail.logout()
+        except (imaplib.IMAP4.error, OSError):
+            pass
+    conexoes.clear()
+
+# -------------------------
+# SINCRONIZAÇÃO
+# -------------------------
+def sincronizar_conta(conta, conexoes, destino):
+    """Roda numa thread: sincroniza as pastas da conta, uma de cada vez, na mesma conexão."""
+    mail = obter_conexao(conta, conexoes)
+    total = 0
+    for pasta in conta['pastas']:
+        status, _ = mail.select(pasta, readonly=True)
+        if status != "OK":
+            print(f"⚠️ [{conta['nome']}] Pasta não encontrada: {pasta}")
+            continue
+        total += len(email_imap.sincronizar(mail, pasta, conta=conta['conta'], destino=destino,
+                                            estrategia=conta.get('busca')))
+    return total
+
+async def sincronizar_conta_async(conta, conexoes, destino, semaforo):
+    async with semaforo:
+        try:
+            total = await asyncio.to_thread(sincronizar_conta, conta, conexoes, destino)
+            print(f"✅ [{conta['nome']}] {total} e-mails processados.")
+        except (imaplib.IMAP4.error, OSError) as e:
+            print(f"❌ [{conta['nome']}] Erro: {e}")
+            conexoes.pop(conta['nome'], None)
+
+async def gravar_anexos(fila, executor):
+    """
+    Gravador único: tira os anexos da fila e salva um de cada vez.
+    Usa um executor próprio, para não disputar threads com os downloads que estão esperando a fila.
+    O resultado (ou o erro) de cada gravação vai para o Future do anexo; um erro não para o gravador.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        anexo, concluido = await fila.get()
+        try:
+            concluido.set_result(await loop.run_in_executor(executor, email_imap.salvar_anexo, *anexo))
+        except Exception as e:
+            print(f"❌ Erro ao gravar o anexo {anexo[2]}: {e}")
+            concluido.set_exception(e)
+        finally:
+            fila.task_done()
+
+async def servico(contas=CONTAS, intervalo=None, max_simultaneas=MAX_CONTAS_SIMULTANEAS):
+    """
+    Sincroniza todas as contas em paralelo (no máximo max_simultaneas por vez).
+    Com intervalo (segundos), repete para sempre mantendo as conexões abertas.
+    """
+    loop = asyncio.get_running_loop()
+    fila = asyncio.Queue(maxsize=TAMANHO_FILA_ANEXOS)
+    semaforo = asyncio.Semaphore(max_simultaneas)
+    conexoes = {}
+
+    def destino(*anexo):
+        # Chamado das threads de download; bloqueia enquanto a fila estiver cheia e depois
+        # até o gravador terminar este anexo (um erro na gravação é levantado aqui)
+        concluido = Future()
+        asyncio.run_coroutine_threadsafe(fila.put((anexo, concluido)), loop).result()
+        return concluido.result()
+
+    executor_gravacao = ThreadPoolExecutor(max_workers=1)
+    gravador = asyncio.create_task(gravar_anexos(fila, executor_gravacao))
+    try:
+        while True:
+            await asyncio.gather(*(sincronizar_conta_async(conta, conexoes, destino, semaforo) for conta in contas))
+            await fila.join()
+            if intervalo is None:
+                break
+            await asyncio.sleep(intervalo)
+    finally:
+        gravador.cancel()
+        executor_gravacao.shutdown()
+        await asyncio.to_thread(fechar_conexoes, conexoes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baixa os anexos de várias contas de e-mail ao mesmo tempo.")
+    parser.add_argument("--intervalo", type=int, default=None,
+                        help="Segundos entre as sincronizações (sem isso roda uma vez e sai)")
+    parser.add_argument("--simultaneas", type=int, default=MAX_CONTAS_SIMULTANEAS,
+                        help="Máximo de contas sincronizando ao mesmo tempo")
+    args = parser.parse_args()
+    asyncio.run(servico(intervalo=args.intervalo, max_simultaneas=args.simultaneas))
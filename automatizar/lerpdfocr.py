@@ -1,26 +1,60 @@
 import os
-import pytesseract
-from pdf2image import convert_from_path
-import re
+import random
+from extracao_pdf import iterar_paginas
+from extracao_campos import compilar_campos, extrair_campos
+from classificador_palavras import compilar_classificador, classificar_texto
 
 # 🔹 Deep Learning (opcional) – carrega só se existir
+# Troque o caminho do modelo abaixo pelo que você treinar
+MODELO_DL = "./modelo_classificador"
 try:
-    from transformers import pipeline
+    if os.path.exists(os.path.join(MODELO_DL, "modelo_int8.onnx")):
+        # Versão int8 gerada por resultados/exportar_onnx.py: roda só na CPU, sem torch
+        from classificador_onnx import carregar_classificador_onnx
+        classificador = carregar_classificador_onnx(MODELO_DL)
+    else:
+        from transformers import pipeline
+        classificador = pipeline("text-classification", model=MODELO_DL)
     DL_MODE = True
-    # Troque o caminho do modelo abaixo pelo que você treinar
-    classificador = pipeline("text-classification", model="./modelo_classificador")
 except ImportError:
     DL_MODE = False
     classificador = None
 
+# 🔹 Nível rápido da cascata (TF-IDF + modelo linear, resultados/modelo_rapido.py) – também opcional
+MODELO_RAPIDO = os.path.join(MODELO_DL, "modelo_rapido.joblib")
+try:
+    from classificador_rapido import carregar_modelo_rapido, prever_com_confianca, LIMIAR_CONFIANCA
+    modelo_rapido = carregar_modelo_rapido(MODELO_RAPIDO) if os.path.exists(MODELO_RAPIDO) else None
+except ImportError:
+    modelo_rapido = None
+
 # Configurações globais
 tesseract_config = '--psm 6'
 tesseract_lang = 'por'
+TAMANHO_LOTE_DL = 16     # textos por chamada do classificador
+MAX_CARACTERES_DL = 512  # corta o texto para evitar entrada enorme no modelo
+AMOSTRA_AUDITORIA = 0.05  # fração das decisões do nível rápido conferida pelo transformer
+
+# Quantos documentos cada nível da cascata respondeu e quanto os níveis concordam
+ESTATISTICAS_CASCATA = {
+    'rapido': 0,
+    'transformer': 0,
+    'palavras': 0,
+    'comparados': 0,   # documentos com resposta dos dois níveis (incertos + auditoria)
+    'concordaram': 0
+}
 
 # Definições de documentos (fallback)
 DEFINIR_NF = {"Prefeitura", "Nota Fiscal", "Nota de Serviço", "Recibo"}
 DEFINIR_BOLETO = {"Linha Digitável", "Código de Barras", "Agência/Código do Beneficiário", "Linha Digitavel", "Agência", "Código do Beneficiário"}
 
+# Classificador por palavras-chave montado uma vez (sem acento, sem diferenciar maiúsculas).
+# Termos de boleto pesam mais para manter a regra antiga: qualquer um deles decide.
+CLASSIFICADOR_PALAVRAS = compilar_classificador({
+    "BOLETO": dict.fromkeys(DEFINIR_BOLETO, 10),
+    "NF": dict.fromkeys(DEFINIR_NF, 1)
+})
+
 CAMPOS_BOLETO = {
     "Nº do Documento": r"\d+",
     "Vencimento": r"\d{2}/\d{2}/\d{4}",
@@ -34,24 +68,90 @@ CAMPOS_NF = {
     "Valor Total da Nota": r"R?\$?\s*\d{1,3}(?:\.\d{3})*,\d{2}"
 }
 
+# Regex compiladas uma vez só (valor até 5 palavras depois do rótulo)
+MOTOR_BOLETO = compilar_campos(CAMPOS_BOLETO, max_palavras=5)
+MOTOR_NF = compilar_campos(CAMPOS_NF, max_palavras=5)
+
 # -------------------------
 # CLASSIFICAÇÃO DE DOCUMENTO
 # -------------------------
+def classificar_palavras(textos):
+    return [classificar_texto(texto, CLASSIFICADOR_PALAVRAS)[0] or "DESCONHECIDO" for texto in textos]
+
+def classificar_transformer(textos, tamanho_lote=TAMANHO_LOTE_DL):
+    """
+    Os textos são ordenados por tamanho e passados ao pipeline em lotes, então cada
+    lote tem pouco padding e roda como uma multiplicação de matrizes só.
+    """
+    cortados = [texto[:MAX_CARACTERES_DL] for texto in textos]
+    ordem = sorted(range(len(cortados)), key=lambda i: len(cortados[i]))
+    tipos = [None] * len(cortados)
+    for inicio in range(0, len(ordem), tamanho_lote):
+        indices = ordem[inicio:inicio + tamanho_lote]
+        resultados = classificador([cortados[i] for i in indices], truncation=True, batch_size=len(indices))
+        for i, resultado in zip(indices, resultados):
+            if isinstance(resultado, list):  # algumas versões devolvem [{'label', 'score'}] por texto
+                resultado = resultado[0]
+            tipos[i] = resultado['label'].upper()
+    return tipos
+
+def classificar_lote(textos, tamanho_lote=TAMANHO_LOTE_DL):
+    """
+    Classifica vários textos de uma vez; os tipos voltam na mesma ordem de textos.
+    Cascata: o modelo rápido decide quando tem confiança >= LIMIAR_CONFIANCA;
+    o resto vai para o transformer (ou para as palavras-chave, sem DL).
+    """
+    tipos = [None] * len(textos)
+    pendentes = list(range(len(textos)))
+    rapidos = {}
+
+    if modelo_rapido is not None and textos:
+        rotulos, confiancas = prever_com_confianca(modelo_rapido, textos)
+        rapidos = {i: rotulo.upper() for i, rotulo in enumerate(rotulos)}
+        pendentes = []
+        for i, confianca in enumerate(confiancas):
+            if confianca >= LIMIAR_CONFIANCA:
+                tipos[i] = rapidos[i]
+                ESTATISTICAS_CASCATA['rapido'] += 1
+            else:
+                pendentes.append(i)
+
+    if DL_MODE and classificador:
+        # Uma amostra das decisões do nível rápido também passa pelo transformer, só para medir concordância
+        auditoria = [i for i in range(len(textos)) if tipos[i] is not None and random.random() < AMOSTRA_AUDITORIA]
+        consultar = pendentes + auditoria
+        if consultar:
+            respostas = dict(zip(consultar, classificar_transformer([textos[i] for i in consultar], tamanho_lote)))
+            for i in pendentes:
+                tipos[i] = respostas[i]
+            ESTATISTICAS_CASCATA['transformer'] += len(pendentes)
+            for i in consultar:
+                if i in rapidos:
+                    ESTATISTICAS_CASCATA['comparados'] += 1
+                    ESTATISTICAS_CASCATA['concordaram'] += rapidos[i] == respostas[i]
+    elif pendentes:
+        for i, tipo in zip(pendentes, classificar_palavras([textos[i] for i in pendentes])):
+            tipos[i] = tipo
+        ESTATISTICAS_CASCATA['palavras'] += len(pendentes)
+    return tipos
+
+def relatorio_cascata():
+    total = ESTATISTICAS_CASCATA['rapido'] + ESTATISTICAS_CASCATA['transformer'] + ESTATISTICAS_CASCATA['palavras']
+    if total == 0:
+        return
+    print("\n📊 Cascata de classificação:")
+    for nivel in ('rapido', 'transformer', 'palavras'):
+        print(f"   {nivel}: {ESTATISTICAS_CASCATA[nivel]} ({ESTATISTICAS_CASCATA[nivel] / total:.0%})")
+    if ESTATISTICAS_CASCATA['comparados']:
+        concordancia = ESTATISTICAS_CASCATA['concordaram'] / ESTATISTICAS_CASCATA['comparados']
+        print(f"   concordância rápido x transformer: {concordancia:.0%} em {ESTATISTICAS_CASCATA['comparados']} documentos")
+
 def detectar_tipo_documento(texto_continuo):
     """Classifica documento usando DL se disponível, senão usa fallback"""
-    if DL_MODE and classificador:
-        resultado = classificador(texto_continuo[:512], truncation=True)  # corta para evitar texto enorme
-        tipo_predito = resultado[0]['label'].upper()
-        print(f"🤖 Classificação IA: {tipo_predito}")
-        return tipo_predito
-
-    # Fallback por palavras-chave
-    texto_lower = texto_continuo.lower()
-    if any(p.lower() in texto_lower for p in DEFINIR_BOLETO):
-        return "BOLETO"
-    if any(p.lower() in texto_lower for p in DEFINIR_NF):
-        return "NF"
-    return "DESCONHECIDO"
+    tipo = classificar_lote([texto_continuo])[0]
+    if modelo_rapido is not None or (DL_MODE and classificador):
+        print(f"🤖 Classificação IA: {tipo}")
+    return tipo
 
 # -------------------------
 # RENOMEAR PDF
@@ -65,46 +165,35 @@ def renomear_pdf(caminho, tipo):
     print(f"📂 Arquivo renomeado para: {novo_nome}")
     return novo_caminho
 
-# -------------------------
-# EXTRAÇÃO POR REGEX (FALLBACK)
-# -------------------------
-def extrair_campos(texto_continuo, campos):
-    encontrados = {}
-    for chave, padrao_base in campos.items():
-        if chave.lower() in texto_continuo.lower():
-            padrao = re.search(
-                rf"{re.escape(chave)}(?:\s+\S+){{0,5}}?\s+({padrao_base})",
-                texto_continuo,
-                re.IGNORECASE
-            )
-            encontrados[chave] = padrao.group(1) if padrao else None
-    return encontrados
-
 # -------------------------
 # PROCESSAR PDF
 # -------------------------
-def processar_pdf(pdf_path, extrair_dados=False):
+def processar_pdf(pdf_path, extrair_dados=False, tipo_documento=None):
+    """tipo_documento: se já classificado (ex.: por classificar_lote), pula a detecção."""
     print(f"\n🔍 Processando o PDF '{pdf_path}'...")
-    imagens = convert_from_path(pdf_path)
+    # Páginas lidas uma a uma: sair do loop cedo não renderiza as seguintes
+    paginas = iterar_paginas(pdf_path, tesseract_config, tesseract_lang)
     
-    tipo_documento = None
+    motor_campos = None
     campos_encontrados = {}
     campos_referencia = {}
     
-    for i, imagem in enumerate(imagens):
-        texto = pytesseract.image_to_string(imagem, config=tesseract_config, lang=tesseract_lang)
+    for i, (texto, origem) in enumerate(paginas):
+        print(f"📃 Página {i+1}: {'camada de texto' if origem == 'texto' else 'OCR'}")
         texto_continuo = " ".join(texto.split())
         
         # Detecta tipo na primeira página
-        if tipo_documento is None:
-            tipo_documento = detectar_tipo_documento(texto_continuo)
+        if motor_campos is None:
+            if tipo_documento is None:
+                tipo_documento = detectar_tipo_documento(texto_continuo)
             print(f"📄 Documento detectado como: {tipo_documento}")
             campos_referencia = CAMPOS_NF if tipo_documento == "NF" else CAMPOS_BOLETO
+            motor_campos = MOTOR_NF if tipo_documento == "NF" else MOTOR_BOLETO
             campos_encontrados = {campo: None for campo in campos_referencia}
         
         # Extração de dados (regex por enquanto)
         if extrair_dados:
-            novos_campos = extrair_campos(texto_continuo, campos_referencia)
+            novos_campos = extrair_campos(texto_continuo, motor_campos)
             for campo, valor in novos_campos.items():
                 if valor and not campos_encontrados[campo]:
                     campos_encontrados[campo] = valor
@@ -112,6 +201,10 @@ def processar_pdf(pdf_path, extrair_dados=False):
             
             if all(campos_encontrados.values()):
                 break
+        else:
+            # Só o tipo interessa, e ele sai da primeira página
+            break
+    paginas.close()
     
     novo_caminho = renomear_pdf(pdf_path, tipo_documento)
     
@@ -122,6 +215,27 @@ def processar_pdf(pdf_path, extrair_dados=False):
     
     return novo_caminho, tipo_documento, campos_encontrados if extrair_dados else None
 
+# -------------------------
+# PROCESSAR PASTA
+# -------------------------
+def ler_primeira_pagina(pdf_path):
+    paginas = iterar_paginas(pdf_path, tesseract_config, tesseract_lang, max_paginas=1)
+    texto, _ = next(paginas, ("", None))
+    paginas.close()
+    return " ".join(texto.split())
+
+def processar_pasta(pasta, extrair_dados=False, tamanho_lote=TAMANHO_LOTE_DL):
+    """
+    Lê a primeira página de todos os PDFs, classifica tudo com classificar_lote
+    e depois renomeia/extrai cada um (a primeira página já vem do cache de OCR).
+    """
+    pdfs = sorted(os.path.join(pasta, f) for f in os.listdir(pasta) if f.lower().endswith(".pdf"))
+    textos = [ler_primeira_pagina(pdf_path) for pdf_path in pdfs]
+    tipos = classificar_lote(textos, tamanho_lote)
+    resultados = [processar_pdf(pdf_path, extrair_dados, tipo) for pdf_path, tipo in zip(pdfs, tipos)]
+    relatorio_cascata()
+    return resultados
+
 # -------------------------
 # EXECUÇÃO
 # -------------------------
@@ -0,0 +1,227 @@
+import os
+import sys
+import time
+import queue
+import imaplib
+import argparse
+import threading
+import email_imap
+
+# processar_pdf, histórico, manifesto e exportação ficam em soauto/automacao-main/up.py.
+# Os módulos compartilhados (extracao_pdf, extracao_campos, ...) são cópias iguais
+# nas duas pastas; como automatizar/ vem antes no sys.path, são os daqui que carregam.
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "soauto", "automacao-main"))
+import up
+
+# Pipeline contínuo: e-mail -> fila de PDFs -> OCR/classificação/extração -> fila de resultados -> Excel.
+# As filas são limitadas: se o OCR atrasa, o download espera; se o Excel atrasa, o OCR espera.
+# Uso: python automatizar/pipeline.py [--intervalo 60] [--workers 2]
+
+# ===============================
+# CONFIGURAÇÃO
+# ===============================
+PASTA_PDFS = email_imap.SAVE_FOLDER
+PASTA_SAIDA = "automatizar/Exel"
+INTERVALO_EMAIL = 60        # segundos entre as sincronizações da caixa
+WORKERS_OCR = 2             # o OCR roda em subprocessos (pdftotext/tesseract), então threads bastam
+TAMANHO_FILA_PDFS = 8
+TAMANHO_FILA_RESULTADOS = 16
+ESPERA_LOTE_EXCEL = 2.0     # segundos juntando resultados antes de cada gravação no Excel
+ESPERA_REPETIR_EXCEL = 30   # segundos até tentar de novo um Excel que falhou (ex.: aberto no Excel)
+TENTATIVAS_FINAIS_EXCEL = 5 # tentativas extras ao parar, se ainda houver resultados sem gravar
+FIM = None                  # marcador de fim nas filas
+
+# ===============================
+# ETAPA 1: E-MAIL
+# ===============================
+def etapa_email(fila_pdfs, parar, intervalo=INTERVALO_EMAIL):
+    """Sincroniza a caixa de tempos em tempos; cada PDF salvo entra direto na fila."""
+
+    def destino(*anexo):
+        filepath = email_imap.salvar_anexo(*anexo)
+        if filepath.lower().endswith(".pdf"):
+            fila_pdfs.put(filepath)  # bloqueia se o OCR estiver atrasado
+
+    mail = None
+    while not parar.is_set():
+        try:
+            if mail is None:
+                mail = email_imap.connect_gmail()
+            else:
+                mail.noop()
+            email_imap.sincronizar(mail, destino=destino)
+        except (imaplib.IMAP4.error, OSError) as e:
+            print(f"❌ Erro na sincronização de e-mail: {e}")
+            mail = None
+        parar.wait(intervalo)
+
+    if mail is not None:
+        try:
+            mail.logout()
+        except (imaplib.IMAP4.error, OSError):
+            pass
+
+# ===============================
+# ETAPA 2: OCR / CLASSIFICAÇÃO / EXTRAÇÃO
+# ===============================
+def etapa_ocr(fila_pdfs, fila_resultados, manifesto, trava_manifesto):
+    while True:
+        pdf_path = fila_pdfs.get()
+        if pdf_path is FIM:
+            fila_pdfs.put(FIM)  # repassa para os outros workers
+            return
+        # Um PDF com problema (ex.: movido entre a listagem e a leitura) não pode derrubar o worker
+        try:
+            if not os.path.exists(pdf_path):
+                continue
+
+            with trava_manifesto:
+                ja_processado, sha = up.verificar_manifesto(manifesto, pdf_path)
+            if ja_processado:
+                print(f"⏩ Arquivo já processado (manifesto), pulando: {os.path.basename(pdf_path)}")
+                continue
+
+            resultado = up.processar_pdf(pdf_path)
+        except Exception as e:
+            print(f"❌ Erro no OCR de {os.path.basename(pdf_path)}: {e}")
+            continue
+        fila_resultados.put((pdf_path, sha, resultado))  # bloqueia se o Excel estiver atrasado
+
+# ===============================
+# ETAPA 3: HISTÓRICO + EXCEL
+# ===============================
+def juntar_lote(fila_resultados, espera=ESPERA_LOTE_EXCEL, espera_primeiro=None):
+    """
+    Espera o primeiro resultado (no máximo espera_primeiro segundos; lista vazia se não vier)
+    e junta os que chegarem em até espera segundos.
+    """
+    try:
+        lote = [fila_resultados.get(timeout=espera_primeiro)]
+    except queue.Empty:
+        return []
+    limite = time.monotonic() + espera
+    while lote[-1] is not FIM:
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            break
+        try:
+            lote.append(fila_resultados.get(timeout=restante))
+        except queue.Empty:
+            break
+    return lote
+
+def registrar_resultado(item, caminho_historico, indice_processados, manifesto):
+    """Histórico + manifesto de um resultado; devolve o resultado se ele deve ir para o Excel."""
+    pdf_path, sha, resultado = item
+    if resultado['Tipo'].startswith("ERRO"):
+        return None
+    caminho_final = os.path.join(os.path.dirname(pdf_path), resultado['Arquivo Renomeado'] or os.path.basename(pdf_path))
+
+    exportar = None
+    if up.documento_ja_registrado(indice_processados, resultado['Tipo'], resultado['Campos']):
+        print(f"⏩ Documento já registrado no log, pulando exportação: {resultado['Arquivo Original']}")
+    elif resultado['Campos']:
+        up.adicionar_ao_historico(caminho_historico, resultado, indice_processados)
+        exportar = resultado
+    up.registrar_no_manifesto(manifesto, caminho_final, resultado, sha)
+    return exportar
+
+def gravar_excel(pendentes, pasta_saida):
+    """Tenta gravar os resultados pendentes; devolve os que continuam pendentes."""
+    try:
+        up.exportar_para_excel(pendentes, pasta_saida)
+        return []
+    except Exception as e:
+        print(f"❌ Erro ao gravar o Excel, {len(pendentes)} resultados guardados para a próxima tentativa: {e}")
+        return pendentes
+
+def etapa_exportacao(fila_resultados, pasta_saida, manifesto, trava_manifesto):
+    """
+    Único escritor do histórico, do manifesto e da planilha.
+    Se o Excel falhar (ex.: planilha aberta), os resultados ficam guardados e a gravação
+    é tentada de novo no próximo lote, ou a cada ESPERA_REPETIR_EXCEL segundos.
+    """
+    caminho_historico = os.path.join(pasta_saida, "arquivos_processados")
+    up.migrar_log_legado(os.path.join(pasta_saida, "arquivos_processados.log"), caminho_historico)
+    up.limpar_log_antigo(caminho_historico)
+    indice_processados = up.indexar_historico(up.ler_log(caminho_historico))
+    caminho_manifesto = os.path.join(pasta_saida, "manifesto_processados.json")
+
+    pendentes_excel = []
+    terminou = False
+    while not terminou:
+        lote = juntar_lote(fila_resultados, espera_primeiro=ESPERA_REPETIR_EXCEL if pendentes_excel else None)
+        terminou = bool(lote) and lote[-1] is FIM
+        with trava_manifesto:
+            for item in (item for item in lote if item is not FIM):
+                try:
+                    resultado = registrar_resultado(item, caminho_historico, indice_processados, manifesto)
+                except Exception as e:
+                    print(f"❌ Erro ao registrar {os.path.basename(item[0])}: {e}")
+                    continue
+                if resultado:
+                    pendentes_excel.append(resultado)
+            try:
+                up.salvar_manifesto(caminho_manifesto, manifesto)
+            except Exception as e:
+                print(f"❌ Erro ao salvar o manifesto (tenta de novo no próximo lote): {e}")
+
+        if pendentes_excel:
+            pendentes_excel = gravar_excel(pendentes_excel, pasta_saida)
+
+    # Parando com o Excel ainda falhando: dá tempo de fechar a planilha antes de desistir
+    for _ in range(TENTATIVAS_FINAIS_EXCEL):
+        if not pendentes_excel:
+            break
+        print(f"⚠️ Feche a planilha: nova tentativa em {ESPERA_REPETIR_EXCEL}s...")
+        time.sleep(ESPERA_REPETIR_EXCEL)
+        pendentes_excel = gravar_excel(pendentes_excel, pasta_saida)
+    if pendentes_excel:
+        print("⚠️ Resultados que não chegaram ao Excel: "
+              + ", ".join(resultado['Arquivo Original'] for resultado in pendentes_excel))
+
+# ===============================
+# EXECUÇÃO
+# ===============================
+def executar(pasta_pdfs=PASTA_PDFS, pasta_saida=PASTA_SAIDA, workers=WORKERS_OCR, intervalo=INTERVALO_EMAIL):
+    os.makedirs(pasta_saida, exist_ok=True)
+    fila_pdfs = queue.Queue(maxsize=TAMANHO_FILA_PDFS)
+    fila_resultados = queue.Queue(maxsize=TAMANHO_FILA_RESULTADOS)
+    manifesto = up.carregar_manifesto(os.path.join(pasta_saida, "manifesto_processados.json"))
+    trava_manifesto = threading.Lock()
+    parar = threading.Event()
+
+    exportador = threading.Thread(target=etapa_exportacao, args=(fila_resultados, pasta_saida, manifesto, trava_manifesto))
+    ocr = [threading.Thread(target=etapa_ocr, args=(fila_pdfs, fila_resultados, manifesto, trava_manifesto))
+           for _ in range(workers)]
+    leitor_email = threading.Thread(target=etapa_email, args=(fila_pdfs, parar, intervalo))
+    for thread in [exportador] + ocr:
+        thread.start()
+
+    # PDFs que já estavam na pasta (de execuções anteriores) entram primeiro
+    for pdf in sorted(f for f in os.listdir(pasta_pdfs) if f.lower().endswith('.pdf')):
+        fila_pdfs.put(os.path.join(pasta_pdfs, pdf))
+    leitor_email.start()
+
+    print(f"🚀 Pipeline rodando: {workers} workers de OCR, e-mail a cada {intervalo}s. Ctrl+C para parar.")
+    try:
+        while leitor_email.is_alive():
+            leitor_email.join(timeout=1)
+    except KeyboardInterrupt:
+        print("\n⏹️ Parando: terminando os PDFs que já estão na fila...")
+        parar.set()
+        leitor_email.join()
+
+    # Fecha as etapas na ordem: OCR termina a fila, depois o exportador grava o resto
+    fila_pdfs.put(FIM)
+    for thread in ocr:
+        thread.join()
+    fila_resultados.put(FIM)
+    exportador.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baixa os boletos do e-mail e já processa e exporta para o Excel.")
+    parser.add_argument("--intervalo", type=int, default=INTERVALO_EMAIL, help="segundos entre as sincronizações de e-mail")
+    parser.add_argument("--workers", type=int, default=WORKERS_OCR, help="threads de OCR")
+    args = parser.parse_args()
+    executar(workers=args.workers, intervalo=args.intervalo)
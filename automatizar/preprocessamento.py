@@ -0,0 +1,185 @@
+import json
+import numpy as np
+from PIL import Image
+
+# Pré-processamento de página para o OCR em cima de um único buffer NumPy (uint8, escala de cinza).
+# Cada etapa altera o buffer no lugar, em faixas de linhas, então os temporários têm o tamanho
+# de uma faixa e não de uma página inteira a 300 dpi.
+# Uso: preprocessar = criar_preprocessamento(("cinza", "mediana", "contraste", "binarizar", "deskew"))
+#      extrair_paginas(pdf, ..., preprocessar=preprocessar)
+# Comparação com a cadeia do PIL: python automatizar/bench_preprocessamento.py
+
+ETAPAS_PADRAO = ("cinza", "mediana", "contraste", "binarizar", "deskew")
+LINHAS_FAIXA = 128          # linhas processadas por vez
+PERCENTIL_CONTRASTE = 1     # % dos pixels mais escuros/claros ignorados no esticamento
+ANGULO_MAXIMO = 5.0         # graus procurados no deskew, para cada lado
+PASSO_ANGULO = 0.25
+ANGULO_MINIMO = 0.2         # abaixo disso a página não é girada
+REDUCAO_DESKEW = 4          # o ângulo é estimado numa visão 1/4 da página (sem cópia)
+BRANCO = 255
+
+# -------------------------
+# HISTOGRAMA
+# -------------------------
+def histograma(buf):
+    contagem = np.zeros(256, dtype=np.int64)
+    for inicio in range(0, buf.shape[0], LINHAS_FAIXA):
+        contagem += np.bincount(buf[inicio:inicio + LINHAS_FAIXA].ravel(), minlength=256)
+    return contagem
+
+def limiar_otsu(contagem):
+    """Limiar que maximiza a variância entre fundo e tinta."""
+    niveis = np.arange(256)
+    peso_fundo = np.cumsum(contagem)
+    peso_tinta = peso_fundo[-1] - peso_fundo
+    soma = np.cumsum(contagem * niveis)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media_fundo = soma / peso_fundo
+        media_tinta = (soma[-1] - soma) / peso_tinta
+        variancia = peso_fundo * peso_tinta * (media_fundo - media_tinta) ** 2
+    return int(np.nanargmax(variancia))
+
+def aplicar_tabela(buf, tabela):
+    """buf[...] = tabela[buf], faixa a faixa."""
+    for inicio in range(0, buf.shape[0], LINHAS_FAIXA):
+        faixa = buf[inicio:inicio + LINHAS_FAIXA]
+        np.take(tabela, faixa, out=faixa)
+
+# -------------------------
+# ETAPAS (todas alteram buf no lugar)
+# -------------------------
+def cinza(img):
+    """
+    Cria o buffer da página em escala de cinza convertendo uma faixa por vez
+    (o PIL faz o L direto do RGB), sem uma imagem L inteira além do buffer.
+    """
+    largura, altura = img.size
+    buf = np.empty((altura, largura), dtype=np.uint8)
+    for inicio in range(0, altura, LINHAS_FAIXA):
+        fim = min(inicio + LINHAS_FAIXA, altura)
+        buf[inicio:fim] = np.asarray(img.crop((0, inicio, largura, fim)).convert("L"))
+    return buf
+
+# Rede de ordenação de 9 elementos que só garante a mediana na posição 4 (Devillard, opt_med9)
+REDE_MEDIANA_9 = ((1, 2), (4, 5), (7, 8), (0, 1), (3, 4), (6, 7), (1, 2), (4, 5), (7, 8), (0, 3),
+                  (5, 8), (4, 7), (3, 6), (1, 4), (2, 5), (4, 7), (4, 2), (6, 4), (4, 2))
+
+def mediana(buf):
+    """Mediana 3x3 (mesmo resultado do ImageFilter.MedianFilter()), com min/max vetorizados."""
+    altura = buf.shape[0]
+    anterior = buf[0].copy()  # linha de cima ainda sem filtro
+    for inicio in range(0, altura, LINHAS_FAIXA):
+        fim = min(inicio + LINHAS_FAIXA, altura)
+        abaixo = buf[fim] if fim < altura else buf[fim - 1]
+        faixa = np.vstack((anterior, buf[inicio:fim], abaixo))
+        faixa = np.pad(faixa, ((0, 0), (1, 1)), mode="edge")
+        anterior = buf[fim - 1].copy()
+        vizinhos = [faixa[1 + dy:faixa.shape[0] - 1 + dy, 1 + dx:faixa.shape[1] - 1 + dx].copy()
+                    for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+        menor = np.empty_like(vizinhos[0])
+        for i, j in REDE_MEDIANA_9:
+            np.minimum(vizinhos[i], vizinhos[j], out=menor)
+            np.maximum(vizinhos[i], vizinhos[j], out=vizinhos[j])
+            vizinhos[i], menor = menor, vizinhos[i]
+        buf[inicio:fim] = vizinhos[4]
+
+def contraste(buf, percentil=PERCENTIL_CONTRASTE):
+    """Estica o intervalo útil de cinzas para 0..255."""
+    acumulado = np.cumsum(histograma(buf)) / buf.size
+    escuro = int(np.searchsorted(acumulado, percentil / 100))
+    claro = int(np.searchsorted(acumulado, 1 - percentil / 100))
+    if claro <= escuro:
+        return
+    niveis = (np.arange(256) - escuro) * 255.0 / (claro - escuro)
+    aplicar_tabela(buf, np.clip(niveis, 0, 255).astype(np.uint8))
+
+def binarizar(buf):
+    """Preto e branco pelo limiar de Otsu."""
+    limiar = limiar_otsu(histograma(buf))
+    aplicar_tabela(buf, np.where(np.arange(256) > limiar, BRANCO, 0).astype(np.uint8))
+
+def estimar_inclinacao(buf, angulo_maximo=ANGULO_MAXIMO, passo=PASSO_ANGULO):
+    """
+    Ângulo (graus, anti-horário) a girar para que as linhas de texto fiquem mais
+    concentradas na projeção horizontal.
+    """
+    visao = buf[::REDUCAO_DESKEW, ::REDUCAO_DESKEW]
+    limiar = limiar_otsu(np.bincount(visao.ravel(), minlength=256))
+    ys, xs = np.nonzero(visao <= limiar)
+    if len(ys) < 100:
+        return 0.0
+    melhor, melhor_pontuacao = 0.0, -1.0
+    for angulo in np.arange(-angulo_maximo, angulo_maximo + passo / 2, passo):
+        linhas = np.round(ys - xs * np.tan(np.radians(angulo))).astype(np.int64)
+        projecao = np.bincount(linhas - linhas.min())
+        pontuacao = float(np.dot(projecao, projecao))
+        if pontuacao > melhor_pontuacao:
+            melhor, melhor_pontuacao = float(angulo), pontuacao
+    return melhor
+
+def deslocar_blocos(buf, deslocamentos, eixo):
+    """
+    Desloca cada linha (eixo=0) para a direita ou cada coluna (eixo=1) para baixo
+    em deslocamentos[i] pixels, preenchendo com branco. Linhas/colunas vizinhas com o
+    mesmo deslocamento são movidas juntas.
+    """
+    mudancas = np.flatnonzero(np.diff(deslocamentos)) + 1
+    for inicio, fim in zip(np.r_[0, mudancas], np.r_[mudancas, len(deslocamentos)]):
+        d = int(deslocamentos[inicio])
+        bloco = buf[inicio:fim] if eixo == 0 else buf[:, inicio:fim].T
+        if d > 0:
+            bloco[:, d:] = bloco[:, :-d]
+            bloco[:, :d] = BRANCO
+        elif d < 0:
+            bloco[:, :d] = bloco[:, -d:]
+            bloco[:, d:] = BRANCO
+
+def girar(buf, angulo):
+    """
+    Gira angulo graus no sentido anti-horário (como Image.rotate) com três cisalhamentos
+    (Paeth): só move pixels dentro de buf. Bom para ângulos pequenos.
+    """
+    teta = np.radians(angulo)
+    altura, largura = buf.shape
+    linhas = np.arange(altura) - altura / 2
+    colunas = np.arange(largura) - largura / 2
+    deslocar_blocos(buf, np.round(linhas * np.tan(teta / 2)).astype(np.int64), 0)
+    deslocar_blocos(buf, np.round(-colunas * np.sin(teta)).astype(np.int64), 1)
+    deslocar_blocos(buf, np.round(linhas * np.tan(teta / 2)).astype(np.int64), 0)
+
+def deskew(buf):
+    angulo = estimar_inclinacao(buf)
+    if abs(angulo) >= ANGULO_MINIMO:
+        girar(buf, angulo)
+    return angulo
+
+ETAPAS = {
+    "mediana": mediana,
+    "contraste": contraste,
+    "binarizar": binarizar,
+    "deskew": deskew
+}
+
+# -------------------------
+# MONTAGEM
+# -------------------------
+def criar_preprocessamento(etapas=ETAPAS_PADRAO):
+    """
+    Devolve preprocessar(img) -> img para o extracao_pdf. "cinza" sempre roda primeiro,
+    porque é ela que cria o buffer; a imagem devolvida usa o mesmo buffer, sem cópia.
+    A função tem .assinatura com as etapas, usada na chave do cache de OCR.
+    """
+    desconhecidas = [etapa for etapa in etapas if etapa != "cinza" and etapa not in ETAPAS]
+    if desconhecidas:
+        raise ValueError(f"Etapas desconhecidas: {desconhecidas} (use {['cinza'] + list(ETAPAS)})")
+
+    def preprocessar(img):
+        buf = cinza(img)
+        for etapa in etapas:
+            if etapa != "cinza":
+                ETAPAS[etapa](buf)
+        return Image.fromarray(buf)
+
+    preprocessar.__name__ = "preprocessar_numpy"
+    preprocessar.assinatura = json.dumps(["numpy", list(etapas), PERCENTIL_CONTRASTE, ANGULO_MAXIMO, PASSO_ANGULO])
+    return preprocessar
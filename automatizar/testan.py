@@ -1,10 +1,9 @@
 import os
 import re
-import pandas as pd
-import pytesseract
-from pdf2image import convert_from_path
-from tqdm import tqdm
-from PIL import Image, ImageEnhance, ImageFilter
+from extracao_pdf import extrair_paginas
+from dataset_pdf import atualizar_dataset, configuracao_ocr, migrar_csv_legado
+from preprocessamento import criar_preprocessamento
+from classificador_palavras import compilar_classificador, classificar_texto
 
 # ===============================
 # Configuração do OCR
@@ -12,21 +11,24 @@ from PIL import Image, ImageEnhance, ImageFilter
 tesseract_config = '--psm 6'
 tesseract_lang = 'por'
 
+# Etapas do pré-processamento em NumPy (ver preprocessamento.py); tire as que piorarem o OCR
+ETAPAS_PREPROCESSAMENTO = ("cinza", "mediana", "contraste", "binarizar", "deskew")
+preprocessar_imagem = criar_preprocessamento(ETAPAS_PREPROCESSAMENTO)
+
 # Palavras-chave para detecção de tipo
 DEFINIR_NF = {"Prefeitura", "Nota Fiscal", "Nota de Serviço", "Recibo"}
 DEFINIR_BOLETO = {"Linha Digitável", "Código de Barras", "Agência/Código do Beneficiário", "Agência", "Código do Beneficiário"}
 
+# Classificador por palavras-chave montado uma vez (sem acento, sem diferenciar maiúsculas).
+# Termos de boleto pesam mais para manter a regra antiga: qualquer um deles decide.
+CLASSIFICADOR_PALAVRAS = compilar_classificador({
+    "BOLETO": dict.fromkeys(DEFINIR_BOLETO, 10),
+    "NF": dict.fromkeys(DEFINIR_NF, 1)
+})
+
 # ===============================
 # Funções auxiliares
 # ===============================
-def preprocessar_imagem(img):
-    """Melhora contraste e nitidez para OCR."""
-    img = img.convert("L")  # escala de cinza
-    img = img.filter(ImageFilter.MedianFilter())  # remove ruído
-    enhancer = ImageEnhance.Contrast(img)
-    img = enhancer.enhance(2)  # aumenta contraste
-    return img
-
 def normalizar_texto(texto):
     """Remove espaços extras e padroniza datas/valores."""
     texto = " ".join(texto.split())  # remove múltiplos espaços
@@ -36,56 +38,35 @@ def normalizar_texto(texto):
 
 def detectar_tipo_documento(texto):
     """Define rótulo do documento baseado no texto extraído."""
-    texto_lower = texto.lower()
-    if any(p.lower() in texto_lower for p in DEFINIR_BOLETO):
-        return "BOLETO"
-    if any(p.lower() in texto_lower for p in DEFINIR_NF):
-        return "NF"
-    return "BOLETO"  # fallback
+    tipo, _, _ = classificar_texto(texto, CLASSIFICADOR_PALAVRAS)
+    return tipo or "BOLETO"  # fallback
 
 def extrair_texto_pdf(pdf_path):
-    """Extrai texto processando cada página do PDF."""
-    imagens = convert_from_path(pdf_path, dpi=300)
-    texto_final = []
-    for img in imagens:
-        img = preprocessar_imagem(img)
-        texto = pytesseract.image_to_string(img, config=tesseract_config, lang=tesseract_lang)
-        texto_final.append(normalizar_texto(texto))
-    return " ".join(texto_final)
+    """Extrai texto de cada página do PDF (camada de texto ou OCR quando não houver)."""
+    paginas = extrair_paginas(pdf_path, tesseract_config, tesseract_lang, dpi=300,
+                              preprocessar=preprocessar_imagem)
+    return " ".join(normalizar_texto(texto) for texto, _ in paginas)
 
 # ===============================
 # Montagem do dataset
 # ===============================
 pasta_base = "automatizar/pdfs"
-csv_dataset = "dataset_classificacao.csv"
-dados = []
-
-# Carregar dataset existente para evitar duplicatas
-if os.path.exists(csv_dataset):
-    df_existente = pd.read_csv(csv_dataset)
-    registros_existentes = set(zip(df_existente["texto"], df_existente["label"]))
-else:
-    registros_existentes = set()
-
-# Ler PDFs e extrair dados
-for pasta_raiz, _, arquivos in os.walk(pasta_base):
-    for arq in tqdm(arquivos, desc=f"Lendo PDFs"):
-        if arq.lower().endswith(".pdf"):
-            caminho_pdf = os.path.join(pasta_raiz, arq)
-            texto = extrair_texto_pdf(caminho_pdf)
-            label = detectar_tipo_documento(texto)
+pasta_dataset = "dataset_pdfs"  # Parquet, uma linha por PDF (ver dataset_pdf.py)
+csv_legado = "dataset_classificacao.csv"  # formato antigo, migrado uma vez para pasta_dataset
+workers = os.cpu_count() or 1  # processos de OCR em paralelo (1 = sequencial)
 
-            if (texto, label) not in registros_existentes:
-                dados.append({"texto": texto, "label": label})
+# O guard é obrigatório: no Windows cada worker importa este arquivo de novo
+if __name__ == "__main__":
+    migrar_csv_legado(csv_legado, pasta_dataset)
 
-# Salvar dataset atualizado
-if dados:
-    df_novo = pd.DataFrame(dados)
-    if os.path.exists(csv_dataset):
-        df_final = pd.concat([df_existente, df_novo], ignore_index=True)
+    # Só os PDFs cujo hash ainda não está no dataset passam pelo OCR
+    novos = atualizar_dataset(
+        pasta_base, pasta_dataset, extrair_texto_pdf,
+        rotular=lambda caminho, texto: detectar_tipo_documento(texto),
+        configuracao=configuracao_ocr(tesseract_config, tesseract_lang, 300, preprocessar_imagem),
+        workers=workers
+    )
+    if novos:
+        print(f"✅ Dataset salvo/atualizado com {novos} registros novos.")
     else:
-        df_final = df_novo
-    df_final.to_csv(csv_dataset, index=False)
-    print(f"✅ Dataset salvo/atualizado com {len(df_final)} registros.")
-else:
-    print("⚠️ Nenhum novo documento para adicionar ao dataset.")
+        print("⚠️ Nenhum novo documento para adicionar ao dataset.")
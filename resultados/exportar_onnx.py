@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import inspect
+import torch
+import numpy as np
+from datasets import ClassLabel, Dataset
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+# Classificador ONNX compartilhado com o lerpdfocr fica em automatizar/
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "automatizar"))
+from classificador_onnx import carregar_classificador_onnx, ARQUIVO_ONNX, ARQUIVO_ONNX_INT8
+from dataset_pdf import ler_dataset
+
+# Exporta o modelo salvo pelo modelo.py para ONNX e gera uma versão int8 (quantização dinâmica
+# dos pesos das camadas lineares), para rodar em máquinas só com CPU.
+# Depois compara o int8 com o modelo fp32 no mesmo split de teste do treino.
+# Uso: python resultados/exportar_onnx.py
+# Para usar no lerpdfocr, copie a pasta do modelo (com os .onnx) para ./modelo_classificador
+
+# ===============================
+# CONFIGURAÇÃO
+# ===============================
+PASTA_MODELO = "resultados"
+PASTA_DATASET = "resultados/dataset_pdfs"
+MAX_TOKENS = 256
+TAMANHO_LOTE = 16
+labels_map = {"NF": 0, "Boleto": 1}  # igual ao modelo.py
+# O export passa as entradas por posição: precisa ser a ordem do forward (BERT, RoBERTa, DistilBERT),
+# não a ordem das chaves do tokenizer (input_ids, token_type_ids, attention_mask no BERT)
+ORDEM_ENTRADAS = ("input_ids", "attention_mask", "token_type_ids")
+
+# ===============================
+# EXPORTAÇÃO
+# ===============================
+def exportar_onnx(pasta_modelo=PASTA_MODELO, max_tokens=MAX_TOKENS):
+    tokenizer = AutoTokenizer.from_pretrained(pasta_modelo)
+    model = AutoModelForSequenceClassification.from_pretrained(pasta_modelo)
+    model.eval()
+
+    exemplo = tokenizer(["Linha Digitável 00190.00009"], truncation=True, max_length=max_tokens, return_tensors="pt")
+    nomes_entrada = [nome for nome in ORDEM_ENTRADAS if nome in exemplo]
+    parametros = list(inspect.signature(model.forward).parameters)
+    if parametros[:len(nomes_entrada)] != nomes_entrada:
+        raise ValueError(f"Entradas {nomes_entrada} fora da ordem do forward do modelo: {parametros[:len(nomes_entrada)]}")
+    eixos = {nome: {0: "lote", 1: "tokens"} for nome in nomes_entrada}
+    eixos["logits"] = {0: "lote"}
+
+    caminho_onnx = os.path.join(pasta_modelo, ARQUIVO_ONNX)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(exemplo[nome] for nome in nomes_entrada),
+            caminho_onnx,
+            input_names=nomes_entrada,
+            output_names=["logits"],
+            dynamic_axes=eixos,
+            opset_version=14
+        )
+    print(f"✅ ONNX fp32 salvo em {caminho_onnx}")
+
+    caminho_int8 = os.path.join(pasta_modelo, ARQUIVO_ONNX_INT8)
+    quantize_dynamic(caminho_onnx, caminho_int8, weight_type=QuantType.QInt8)
+    print(f"✅ ONNX int8 salvo em {caminho_int8}")
+    return caminho_onnx, caminho_int8
+
+# ===============================
+# PARIDADE COM O FP32
+# ===============================
+def split_teste():
+    """Mesmo split do modelo.py (test_size=0.2, estratificado, seed=42)."""
+    df = ler_dataset(PASTA_DATASET, ["texto", "label"])
+    dataset = Dataset.from_pandas(df.assign(label=df["label"].map(labels_map)), preserve_index=False)
+    # stratify_by_column só aceita coluna ClassLabel (e é assim que o modelo.py separa)
+    dataset = dataset.cast_column("label", ClassLabel(names=list(labels_map)))
+    splits = dataset.train_test_split(test_size=0.2, stratify_by_column="label", seed=42)
+    return splits["test"]["texto"], splits["test"]["label"]
+
+def prever_fp32(textos, pasta_modelo=PASTA_MODELO, max_tokens=MAX_TOKENS):
+    tokenizer = AutoTokenizer.from_pretrained(pasta_modelo)
+    model = AutoModelForSequenceClassification.from_pretrained(pasta_modelo)
+    model.eval()
+    predicoes = []
+    with torch.no_grad():
+        for inicio in range(0, len(textos), TAMANHO_LOTE):
+            tokens = tokenizer(textos[inicio:inicio + TAMANHO_LOTE], truncation=True, max_length=max_tokens,
+                               padding=True, return_tensors="pt")
+            predicoes.extend(model(**tokens).logits.argmax(dim=-1).tolist())
+    return predicoes
+
+def prever_onnx(textos, arquivo, pasta_modelo=PASTA_MODELO, max_tokens=MAX_TOKENS):
+    classificador = carregar_classificador_onnx(pasta_modelo, arquivo, max_tokens)
+    label2id = AutoConfig.from_pretrained(pasta_modelo).label2id
+    return [label2id[resultado['label']] for resultado in classificador(list(textos), batch_size=TAMANHO_LOTE)]
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+def verificar_paridade(pasta_modelo=PASTA_MODELO):
+    textos, labels = split_teste()
+    labels = np.array(labels)
+    print(f"\n📊 Paridade no split de teste ({len(textos)} documentos)")
+    print(f"{'modelo':>10} {'acurácia':>9} {'concorda c/ fp32':>17} {'ms/doc':>8} {'arquivo (MB)':>13}")
+
+    fp32, tempo_fp32 = medir(prever_fp32, textos, pasta_modelo)
+    fp32 = np.array(fp32)
+    tamanho_fp32 = sum(os.path.getsize(os.path.join(pasta_modelo, f)) for f in os.listdir(pasta_modelo)
+                       if f.endswith((".bin", ".safetensors")))
+    print(f"{'fp32':>10} {(fp32 == labels).mean():>9.2%} {'-':>17} {tempo_fp32 * 1000 / len(textos):>8.1f} "
+          f"{tamanho_fp32 / 1e6:>13.1f}")
+
+    relatorio = {}
+    for nome, arquivo in (("onnx", ARQUIVO_ONNX), ("onnx int8", ARQUIVO_ONNX_INT8)):
+        predicoes, tempo = medir(prever_onnx, textos, arquivo, pasta_modelo)
+        predicoes = np.array(predicoes)
+        relatorio[nome] = {
+            'acuracia': float((predicoes == labels).mean()),
+            'concordancia_fp32': float((predicoes == fp32).mean()),
+            'ms_por_doc': tempo * 1000 / len(textos)
+        }
+        print(f"{nome:>10} {relatorio[nome]['acuracia']:>9.2%} {relatorio[nome]['concordancia_fp32']:>17.2%} "
+              f"{relatorio[nome]['ms_por_doc']:>8.1f} {os.path.getsize(os.path.join(pasta_modelo, arquivo)) / 1e6:>13.1f}")
+
+    if relatorio["onnx int8"]['acuracia'] + 0.01 < (fp32 == labels).mean():
+        print("⚠️ O int8 perdeu mais de 1 ponto de acurácia: prefira o modelo.onnx (fp32) no lerpdfocr.")
+    return relatorio
+
+if __name__ == "__main__":
+    exportar_onnx()
+    verificar_paridade()
@@ -1,44 +1,50 @@
 import os
 import re
-import pandas as pd
-import pytesseract
-from pdf2image import convert_from_path
+import sys
+import time
+import shutil
+import hashlib
 from tqdm import tqdm
-from PIL import Image, ImageEnhance, ImageFilter
 import torch
 import numpy as np
-from datasets import load_dataset
+from datasets import ClassLabel, Dataset, load_from_disk, concatenate_datasets
 from transformers import (
     AutoTokenizer,
     AutoModelForSequenceClassification,
     TrainingArguments,
     Trainer,
-    EarlyStoppingCallback
+    EarlyStoppingCallback,
+    DataCollatorWithPadding
 )
 import evaluate
 
+# Extração compartilhada (camada de texto + OCR) fica em automatizar/
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "automatizar"))
+from extracao_pdf import extrair_paginas
+from dataset_pdf import atualizar_dataset, configuracao_ocr, ler_dataset, migrar_csv_legado
+from preprocessamento import criar_preprocessamento
+
 # ===============================
 # CONFIGURAÇÃO
 # ===============================
 PASTA_ANO_FISCAL = "automatizar/pdfs/BOLETOS" 
-CSV_DATASET = "resultados/dataset_classificacao.csv"
+PASTA_DATASET = "resultados/dataset_pdfs"  # Parquet, uma linha por PDF (ver dataset_pdf.py)
+CSV_LEGADO = "resultados/dataset_classificacao.csv"  # formato antigo, migrado uma vez para PASTA_DATASET
 TIPOS_VALIDOS = {"NF", "Boleto"}  # tipos aceitos para treino
 MODELO_BASE = "neuralmind/bert-base-portuguese-cased"
 MAX_TOKENS = 256
+DPI_OCR = 300
+CACHE_TOKENIZADO = "resultados/cache_tokenizado"  # Arrow, uma subpasta por tokenizer + MAX_TOKENS
+TAMANHO_LOTE = 8
+LOTES_MEDICAO = 10  # lotes usados na comparação de tokens/s (0 desliga)
 
 # ===============================
 # FUNÇÕES DE OCR E PRÉ-PROCESSAMENTO
 # ===============================
 tesseract_config = '--psm 6'
 tesseract_lang = 'por'
-
-def preprocessar_imagem(img):
-    """Melhora contraste e nitidez para OCR."""
-    img = img.convert("L")
-    img = img.filter(ImageFilter.MedianFilter())
-    enhancer = ImageEnhance.Contrast(img)
-    img = enhancer.enhance(2)
-    return img
+ETAPAS_PREPROCESSAMENTO = ("cinza", "mediana", "contraste", "binarizar", "deskew")
+preprocessar_imagem = criar_preprocessamento(ETAPAS_PREPROCESSAMENTO)
 
 def normalizar_texto(texto):
     """Remove espaços extras e padroniza datas/valores."""
@@ -48,66 +54,90 @@ def normalizar_texto(texto):
     return texto
 
 def extrair_texto_pdf(pdf_path):
-    """Extrai texto de todas as páginas do PDF."""
-    imagens = convert_from_path(pdf_path, dpi=300)
-    texto_final = []
-    for img in imagens:
-        img = preprocessar_imagem(img)
-        texto = pytesseract.image_to_string(img, config=tesseract_config, lang=tesseract_lang)
-        texto_final.append(normalizar_texto(texto))
-    return " ".join(texto_final)
+    """Extrai texto de todas as páginas do PDF (camada de texto ou OCR quando não houver)."""
+    paginas = extrair_paginas(pdf_path, tesseract_config, tesseract_lang, dpi=DPI_OCR,
+                              preprocessar=preprocessar_imagem)
+    return " ".join(normalizar_texto(texto) for texto, _ in paginas)
 
 # ===============================
 # MONTAGEM DO DATASET
 # ===============================
-if os.path.exists(CSV_DATASET):
-    df_existente = pd.read_csv(CSV_DATASET)
-    registros_existentes = set(zip(df_existente["texto"], df_existente["label"]))
-else:
-    registros_existentes = set()
-dados = []
-
-for pasta_mes, _, arquivos in os.walk(PASTA_ANO_FISCAL):
-    for arq in arquivos:
-        if arq.lower().endswith(".pdf"):
-            partes = arq.rsplit(" - ", 1)
-            if len(partes) < 2:
-                continue
-            tipo = partes[-1].replace(".pdf", "").strip()
-            if tipo not in TIPOS_VALIDOS:
-                continue
-
-            caminho_pdf = os.path.join(pasta_mes, arq)
-            texto = extrair_texto_pdf(caminho_pdf)
-            if (texto, tipo) not in registros_existentes:
-                dados.append({"texto": texto, "label": tipo})
-
-if dados:
-    df_novo = pd.DataFrame(dados)
-    if os.path.exists(CSV_DATASET):
-        df_final = pd.concat([df_existente, df_novo], ignore_index=True)
-    else:
-        df_final = df_novo
-    df_final.to_csv(CSV_DATASET, index=False)
-    print(f"✅ Dataset atualizado com {len(df_final)} registros.")
+def tipo_pelo_nome(caminho_pdf):
+    """Rótulo vem do nome do arquivo ("... - NF.pdf"); None se não for um tipo válido."""
+    partes = os.path.basename(caminho_pdf).rsplit(" - ", 1)
+    if len(partes) < 2:
+        return None
+    tipo = partes[-1].replace(".pdf", "").strip()
+    return tipo if tipo in TIPOS_VALIDOS else None
+
+migrar_csv_legado(CSV_LEGADO, PASTA_DATASET)
+
+# Só os PDFs cujo hash ainda não está no dataset passam pelo OCR
+novos = atualizar_dataset(
+    PASTA_ANO_FISCAL, PASTA_DATASET, extrair_texto_pdf,
+    rotular=lambda caminho, texto: tipo_pelo_nome(caminho),
+    configuracao=configuracao_ocr(tesseract_config, tesseract_lang, DPI_OCR, preprocessar_imagem),
+    aceitar=lambda caminho: tipo_pelo_nome(caminho) is not None
+)
+if novos:
+    print(f"✅ Dataset atualizado com {novos} registros novos.")
 else:
     print("⚠️ Nenhum novo documento para adicionar ao dataset.")
 
 # ===============================
 # TREINAMENTO DO MODELO
 # ===============================
-dataset = load_dataset('csv', data_files=CSV_DATASET)
 tokenizer = AutoTokenizer.from_pretrained(MODELO_BASE)
 labels_map = {"NF": 0, "Boleto": 1}
 
 def preprocess_function(examples):
-    return tokenizer(examples["texto"], truncation=True, padding="max_length", max_length=MAX_TOKENS)
+    # Sem padding aqui: o DataCollatorWithPadding completa cada lote só até o maior texto dele.
+    # "length" é usado pelo group_by_length para juntar textos de tamanho parecido nos lotes de treino.
+    return tokenizer(examples["texto"], truncation=True, max_length=MAX_TOKENS, return_length=True)
+
+def chave_registro(texto, label):
+    return hashlib.sha1(f"{label}\0{texto}".encode("utf-8")).hexdigest()
+
+def carregar_dataset_tokenizado(pasta_dataset=PASTA_DATASET):
+    """
+    Dataset já tokenizado, na ordem do dataset em Parquet. O cache em disco guarda cada registro pela
+    chave (hash de texto + label); só os registros que ainda não estão nele passam pelo tokenizer.
+    """
+    pasta_cache = os.path.join(CACHE_TOKENIZADO, f"{MODELO_BASE.replace('/', '--')}_{MAX_TOKENS}")
+    df = ler_dataset(pasta_dataset, ["texto", "label"])
+    chaves = [chave_registro(texto, label) for texto, label in zip(df["texto"], df["label"])]
+
+    cache = load_from_disk(pasta_cache) if os.path.exists(pasta_cache) else None
+    posicoes = {chave: i for i, chave in enumerate(cache["chave"])} if cache is not None else {}
+    novos = df.assign(chave=chaves)[[chave not in posicoes for chave in chaves]].drop_duplicates("chave")
+
+    if len(novos):
+        print(f"🔤 Tokenizando {len(novos)} registros novos ({len(posicoes)} já no cache)...")
+        tokenizado = Dataset.from_pandas(novos.assign(label=novos["label"].map(labels_map)), preserve_index=False)
+        tokenizado = tokenizado.map(preprocess_function, batched=True)
+        cache = concatenate_datasets([cache, tokenizado]) if cache is not None else tokenizado
+
+        # Grava numa pasta temporária e troca: o cache antigo está mapeado em memória
+        temporaria = pasta_cache + ".tmp"
+        shutil.rmtree(temporaria, ignore_errors=True)
+        cache.save_to_disk(temporaria)
+        shutil.rmtree(pasta_cache, ignore_errors=True)
+        os.replace(temporaria, pasta_cache)
+        cache = load_from_disk(pasta_cache)
+        posicoes = {chave: i for i, chave in enumerate(cache["chave"])}
+    else:
+        print(f"♻️ Todos os {len(chaves)} registros já estão tokenizados em {pasta_cache}")
+
+    return cache.select([posicoes[chave] for chave in chaves])
 
-dataset = dataset.map(preprocess_function, batched=True)
-dataset = dataset.map(lambda e: {"label": labels_map[e["label"]]})
-splits = dataset["train"].train_test_split(test_size=0.2, stratify_by_column="label", seed=42)
+# stratify_by_column só aceita coluna ClassLabel; os nomes seguem a ordem de labels_map
+dataset = carregar_dataset_tokenizado().cast_column("label", ClassLabel(names=list(labels_map)))
+splits = dataset.train_test_split(test_size=0.2, stratify_by_column="label", seed=42)
 
-model = AutoModelForSequenceClassification.from_pretrained(MODELO_BASE, num_labels=2)
+# id2label vai para o config.json: o pipeline e o ONNX devolvem "NF"/"Boleto" em vez de LABEL_0/1
+model = AutoModelForSequenceClassification.from_pretrained(
+    MODELO_BASE, num_labels=2, id2label={v: k for k, v in labels_map.items()}, label2id=labels_map
+)
 
 # Métricas
 acc = evaluate.load("accuracy")
@@ -121,21 +151,57 @@ def compute_metrics(eval_pred):
     }
 
 # Balanceamento de classes
-df_labels = pd.read_csv(CSV_DATASET)
+df_labels = ler_dataset(PASTA_DATASET, ["label"])
 class_counts = df_labels["label"].value_counts().to_dict()
 total_samples = len(df_labels)
 class_weights = {labels_map[k]: total_samples / v for k, v in class_counts.items()}
 class_weights_tensor = torch.tensor([class_weights[0], class_weights[1]], dtype=torch.float)
 model.config.class_weights = class_weights_tensor.tolist()
 
+# Padding dinâmico
+data_collator = DataCollatorWithPadding(tokenizer)
+
+def medir_tokens_por_segundo(dataset, collator, agrupar, n_lotes=LOTES_MEDICAO):
+    """Forward + backward em alguns lotes; devolve (tokens reais/s, fração de padding)."""
+    amostra = dataset.shuffle(seed=42).select(range(min(len(dataset), n_lotes * TAMANHO_LOTE)))
+    ordem = list(range(len(amostra)))
+    if agrupar:
+        ordem.sort(key=lambda i: amostra[i]["length"])
+    reais = totais = 0
+    model.train()
+    inicio = time.perf_counter()
+    for pos in range(0, len(ordem), TAMANHO_LOTE):
+        exemplos = [amostra[i] for i in ordem[pos:pos + TAMANHO_LOTE]]
+        lote = collator([{k: e[k] for k in tokenizer.model_input_names if k in e} for e in exemplos])
+        lote["labels"] = torch.tensor([e["label"] for e in exemplos])
+        model(**lote).loss.backward()
+        reais += int(lote["attention_mask"].sum())
+        totais += lote["attention_mask"].numel()
+    tempo = time.perf_counter() - inicio
+    model.zero_grad()
+    return reais / tempo, 1 - reais / totais
+
+if LOTES_MEDICAO:
+    print(f"\n📊 Tokens reais por segundo no treino ({LOTES_MEDICAO} lotes de {TAMANHO_LOTE}, CPU/GPU atual):")
+    medicoes = {
+        "antes (max_length)": medir_tokens_por_segundo(
+            splits["train"], DataCollatorWithPadding(tokenizer, padding="max_length", max_length=MAX_TOKENS), False),
+        "dinâmico": medir_tokens_por_segundo(splits["train"], data_collator, False),
+        "dinâmico + agrupado": medir_tokens_por_segundo(splits["train"], data_collator, True)
+    }
+    base = medicoes["antes (max_length)"][0]
+    for nome, (tokens_s, padding) in medicoes.items():
+        print(f"   {nome:>20}: {tokens_s:>8.0f} tokens/s, {padding:.0%} padding, {tokens_s / base:.1f}x")
+
 # Argumentos de treino
 args = TrainingArguments(
     output_dir="./resultados_classificador",
     evaluation_strategy="epoch",
     save_strategy="epoch",
     learning_rate=3e-5,
-    per_device_train_batch_size=8,
-    per_device_eval_batch_size=8,
+    per_device_train_batch_size=TAMANHO_LOTE,
+    per_device_eval_batch_size=TAMANHO_LOTE,
+    group_by_length=True,  # só muda o sampler do treino; a avaliação segue na ordem do split
     num_train_epochs=10,
     weight_decay=0.01,
     logging_dir="./logs",
@@ -152,12 +218,16 @@ trainer = Trainer(
     train_dataset=splits["train"],
     eval_dataset=splits["test"],
     tokenizer=tokenizer,
+    data_collator=data_collator,
     compute_metrics=compute_metrics,
     callbacks=[EarlyStoppingCallback(early_stopping_patience=3)]
 )
 
 print("🚀 Iniciando treinamento...")
-trainer.train()
+resultado_treino = trainer.train()
+tokens_epoca = sum(splits["train"]["length"])
+print(f"⏱️ Treino em {resultado_treino.metrics['train_runtime'] / 60:.1f} min, "
+      f"{tokens_epoca * trainer.state.epoch / resultado_treino.metrics['train_runtime']:.0f} tokens reais/s")
 
 # Salvar modelo
 model.save_pretrained("resultados")
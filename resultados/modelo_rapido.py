@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+from sklearn.model_selection import train_test_split
+
+# Modelo rápido compartilhado com o lerpdfocr fica em automatizar/
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "automatizar"))
+from classificador_rapido import treinar_modelo_rapido, salvar_modelo_rapido, prever_com_confianca, LIMIAR_CONFIANCA
+from dataset_pdf import ler_dataset, migrar_csv_legado
+
+# Treina o nível rápido da cascata (TF-IDF de n-gramas de caracteres + regressão logística)
+# no dataset do modelo.py (resultados/dataset_pdfs) e mostra, no split de teste, quanto ele resolve sozinho
+# e quanto concorda com o transformer (se o modelo.py já tiver salvo um em PASTA_MODELO).
+# Uso: python resultados/modelo_rapido.py
+# Para usar no lerpdfocr, copie modelo_rapido.joblib para ./modelo_classificador
+
+# ===============================
+# CONFIGURAÇÃO
+# ===============================
+PASTA_DATASET = "resultados/dataset_pdfs"
+CSV_LEGADO = "resultados/dataset_classificacao.csv"  # igual ao modelo.py
+PASTA_MODELO = "resultados"
+ARQUIVO_MODELO_RAPIDO = "resultados/modelo_rapido.joblib"
+MAX_CARACTERES_DL = 512
+
+# ===============================
+# AVALIAÇÃO
+# ===============================
+def prever_transformer(textos):
+    """Rótulos do transformer salvo pelo modelo.py, ou None se não houver modelo/transformers."""
+    if not os.path.exists(os.path.join(PASTA_MODELO, "config.json")):
+        return None
+    try:
+        from transformers import pipeline
+    except ImportError:
+        return None
+    classificador = pipeline("text-classification", model=PASTA_MODELO)
+    resultados = classificador([texto[:MAX_CARACTERES_DL] for texto in textos], truncation=True, batch_size=16)
+    return [resultado['label'] for resultado in resultados]
+
+def acuracia(indices, previstos, labels):
+    indices = list(indices)
+    return sum(previstos[i] == labels[i] for i in indices) / len(indices) if indices else 0
+
+def avaliar_cascata(modelo, textos, labels):
+    inicio = time.perf_counter()
+    rotulos, confiancas = prever_com_confianca(modelo, textos)
+    tempo = time.perf_counter() - inicio
+
+    todos = range(len(textos))
+    confiantes = [i for i in todos if confiancas[i] >= LIMIAR_CONFIANCA]
+    incertos = set(todos) - set(confiantes)
+
+    print(f"\n📊 Split de teste: {len(textos)} documentos, limiar de confiança {LIMIAR_CONFIANCA}")
+    print(f"   Nível rápido: {tempo * 1e6 / len(textos):.0f} µs/doc, acurácia geral {acuracia(todos, rotulos, labels):.2%}")
+    print(f"   Resolve sozinho: {len(confiantes)} ({len(confiantes) / len(textos):.0%}), "
+          f"acurácia {acuracia(confiantes, rotulos, labels):.2%}")
+    print(f"   Vão para o transformer: {len(incertos)} ({len(incertos) / len(textos):.0%})")
+
+    transformer = prever_transformer(textos)
+    if transformer is None:
+        print("   (sem transformer treinado em resultados/: concordância e acurácia da cascata não calculadas)")
+        return
+
+    cascata = [transformer[i] if i in incertos else rotulos[i] for i in todos]
+    print(f"   Transformer sozinho: acurácia {acuracia(todos, transformer, labels):.2%}")
+    print(f"   Cascata: acurácia {acuracia(todos, cascata, labels):.2%}")
+    print(f"   Concordância rápido x transformer: {acuracia(todos, rotulos, transformer):.2%} no total, "
+          f"{acuracia(confiantes, rotulos, transformer):.2%} nos que o rápido decide")
+
+# ===============================
+# TREINAMENTO
+# ===============================
+if __name__ == "__main__":
+    migrar_csv_legado(CSV_LEGADO, PASTA_DATASET)
+    df = ler_dataset(PASTA_DATASET, ["texto", "label"]).dropna(subset=["texto", "label"])
+    textos, labels = df["texto"].tolist(), df["label"].tolist()
+
+    treino_x, teste_x, treino_y, teste_y = train_test_split(
+        textos, labels, test_size=0.2, stratify=labels, random_state=42
+    )
+    inicio = time.perf_counter()
+    modelo = treinar_modelo_rapido(treino_x, treino_y)
+    print(f"🚀 Modelo rápido treinado em {time.perf_counter() - inicio:.1f}s com {len(treino_x)} documentos")
+    avaliar_cascata(modelo, teste_x, teste_y)
+
+    # Versão final com o dataset inteiro
+    modelo = treinar_modelo_rapido(textos, labels)
+    salvar_modelo_rapido(modelo, ARQUIVO_MODELO_RAPIDO)
+    print(f"✅ Modelo rápido salvo em {ARQUIVO_MODELO_RAPIDO}")
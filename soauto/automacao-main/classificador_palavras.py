@@ -0,0 +1,117 @@
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+
+# Classificação por palavras-chave. O texto é normalizado de uma vez (sem acento e em
+# minúsculas) com uma tabela de 256 bytes e cada palavra-chave é procurada com str.find,
+# tudo em C. Só os caracteres fora do Latin-1 (aspas curvas, travessão...) ou que não viram
+# exatamente um caractere (ex.: 'ß' -> 'ss') passam por unicodedata um a um, e as posições
+# no texto original só são recalculadas para as palavras encontradas.
+
+MARCA = "?"  # na tabela: caractere que precisa do caminho lento
+
+@lru_cache(maxsize=4096)
+def normalizar_caractere(ch):
+    """'Á' -> 'a', 'ç' -> 'c'. Pode virar mais de um caractere (ex.: 'ß' -> 'ss') ou nenhum."""
+    decomposto = unicodedata.normalize("NFKD", ch)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+def montar_tabela_latin1():
+    """bytes.translate: cada caractere Latin-1 vira a forma normalizada, ou MARCA se ela não couber em um byte."""
+    tabela = bytearray(256)
+    for codigo in range(256):
+        troca = normalizar_caractere(chr(codigo))
+        tabela[codigo] = ord(troca) if len(troca) == 1 and ord(troca) < 256 else ord(MARCA)
+    return bytes(tabela)
+
+TABELA_LATIN1 = montar_tabela_latin1()
+
+def normalizar(texto):
+    """
+    Texto sem acento e em minúsculas, mais os ajustes de posição: lista de
+    (posição normalizada, posição original, tamanho normalizado) de cada caractere
+    que não virou exatamente um (normalmente vazia).
+    """
+    # "replace" troca cada caractere fora do Latin-1 por um MARCA: as posições continuam as mesmas
+    normalizado = texto.encode("latin-1", "replace").translate(TABELA_LATIN1).decode("latin-1")
+    if MARCA not in normalizado:
+        return normalizado, []
+
+    partes, ajustes = [], []
+    inicio = deslocamento = 0
+    i = normalizado.find(MARCA)
+    while i != -1:
+        if texto[i] != MARCA:
+            troca = normalizar_caractere(texto[i])
+            partes.append(normalizado[inicio:i])
+            partes.append(troca)
+            if len(troca) != 1:
+                ajustes.append((i + deslocamento, i, len(troca)))
+                deslocamento += len(troca) - 1
+            inicio = i + 1
+        i = normalizado.find(MARCA, i + 1)
+    partes.append(normalizado[inicio:])
+    return "".join(partes), ajustes
+
+def posicao_original(posicao, ajustes, inicios):
+    """Posição no texto original do caractere na posição dada do texto normalizado."""
+    indice = bisect_right(inicios, posicao) - 1
+    if indice < 0:
+        return posicao
+    inicio_normalizado, original, tamanho = ajustes[indice]
+    if posicao < inicio_normalizado + tamanho:
+        return original  # dentro da expansão de um único caractere
+    return original + 1 + posicao - (inicio_normalizado + tamanho)
+
+def compilar_classificador(grupos):
+    """
+    grupos: {rótulo: palavras}, onde palavras é um conjunto (peso 1) ou {palavra: peso}.
+    Palavras iguais depois de tirar acento (ex.: "Digitável"/"Digitavel") viram uma só.
+    """
+    palavras = {}  # forma normalizada -> (palavra original, rótulo, peso)
+    for rotulo, itens in grupos.items():
+        pesos = itens if isinstance(itens, dict) else dict.fromkeys(itens, 1)
+        for palavra, peso in pesos.items():
+            chave = normalizar(palavra)[0]
+            if chave and (chave not in palavras or peso > palavras[chave][2]):
+                palavras[chave] = (palavra, rotulo, peso)
+
+    return {
+        'palavras': palavras,
+        'rotulos': list(grupos)
+    }
+
+def buscar_palavras(texto, classificador):
+    """
+    Todas as ocorrências das palavras-chave (inclusive sobrepostas).
+    Retorna lista de (palavra, rótulo, peso, início, fim), com posições no texto original.
+    """
+    normalizado, ajustes = normalizar(texto)
+    inicios = [ajuste[0] for ajuste in ajustes]
+
+    ocorrencias = []
+    for chave, (palavra, rotulo, peso) in classificador['palavras'].items():
+        inicio = normalizado.find(chave)
+        while inicio != -1:
+            ocorrencias.append((palavra, rotulo, peso, posicao_original(inicio, ajustes, inicios),
+                                posicao_original(inicio + len(chave) - 1, ajustes, inicios) + 1))
+            inicio = normalizado.find(chave, inicio + 1)
+    ocorrencias.sort(key=lambda ocorrencia: (ocorrencia[4], ocorrencia[3]))
+    return ocorrencias
+
+def classificar_texto(texto, classificador):
+    """
+    Soma o peso de cada palavra-chave distinta encontrada, por rótulo.
+    Retorna (rótulo vencedor ou None, {rótulo: pontuação}, ocorrências).
+    Empate fica com o rótulo que vem primeiro em grupos.
+    """
+    ocorrencias = buscar_palavras(texto, classificador)
+    pontuacoes = dict.fromkeys(classificador['rotulos'], 0)
+    contadas = set()
+    for palavra, rotulo, peso, _, _ in ocorrencias:
+        if palavra not in contadas:
+            contadas.add(palavra)
+            pontuacoes[rotulo] += peso
+
+    melhor = max(classificador['rotulos'], key=lambda rotulo: pontuacoes[rotulo])
+    return (melhor if pontuacoes[melhor] > 0 else None), pontuacoes, ocorrencias
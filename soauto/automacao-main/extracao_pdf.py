@@ -0,0 +1,188 @@
+import os
+import json
+import hashlib
+import tempfile
+import subprocess
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+# Mínimo de letras/dígitos para considerar que a página tem texto embutido de verdade
+# (PDFs escaneados às vezes trazem só um cabeçalho ou lixo na camada de texto)
+MIN_CARACTERES_TEXTO = 20
+
+ORIGEM_TEXTO = "texto"
+ORIGEM_OCR = "ocr"
+
+# Cache em disco do texto por página, compartilhado por todos os scripts
+CACHE_DIR = os.environ.get("VIDAFACIL_CACHE_OCR", ".cache_ocr")
+CACHE_TAMANHO_MAXIMO = 200 * 1024 * 1024  # bytes; os mais antigos são removidos acima disso
+CACHE_FOLGA = 0.9  # a limpeza desce até 90% do máximo, para não rodar de novo na gravação seguinte
+
+# Tamanho do cache em bytes por pasta, somado a cada gravação deste processo.
+# A pasta só é listada na primeira gravação e quando a soma passa do máximo.
+TAMANHO_CACHE = {}
+
+# -------------------------
+# CACHE DE OCR
+# -------------------------
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """SHA-256 do conteúdo do arquivo (não depende do nome, então sobrevive a renomear_pdf)."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def chave_cache(hash_pdf, tesseract_config, tesseract_lang, dpi, preprocessar):
+    """Chave = hash do PDF + tudo que muda o resultado do OCR."""
+    # .assinatura (preprocessamento.criar_preprocessamento) inclui as etapas configuradas
+    nome_preprocessamento = None
+    if preprocessar:
+        nome_preprocessamento = getattr(preprocessar, "assinatura", None) or getattr(preprocessar, "__name__", None)
+    configuracao = json.dumps([tesseract_config, tesseract_lang, dpi, nome_preprocessamento])
+    return hashlib.sha256(f"{hash_pdf}|{configuracao}".encode("utf-8")).hexdigest()
+
+def ler_cache(chave, cache_dir=CACHE_DIR):
+    caminho = os.path.join(cache_dir, f"{chave}.json")
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            entrada = json.load(f)
+        os.utime(caminho)  # marca como usado recentemente para a remoção por tamanho
+        return entrada
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def gravar_cache(chave, entrada, cache_dir=CACHE_DIR, tamanho_maximo=CACHE_TAMANHO_MAXIMO):
+    os.makedirs(cache_dir, exist_ok=True)
+    # Grava em arquivo temporário e troca de uma vez, seguro com vários processos
+    fd, temporario = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entrada, f, ensure_ascii=False)
+    destino = os.path.join(cache_dir, f"{chave}.json")
+    os.replace(temporario, destino)
+
+    if cache_dir not in TAMANHO_CACHE:
+        TAMANHO_CACHE[cache_dir] = tamanho_cache(cache_dir)
+    else:
+        # Sobrescrever uma chave conta em dobro: só adianta um pouco a próxima limpeza
+        TAMANHO_CACHE[cache_dir] += os.path.getsize(destino)
+    if TAMANHO_CACHE[cache_dir] > tamanho_maximo:
+        TAMANHO_CACHE[cache_dir] = limpar_cache(cache_dir, tamanho_maximo)
+
+def listar_entradas(cache_dir):
+    entradas = []
+    for item in os.scandir(cache_dir):
+        if item.name.endswith(".json"):
+            info = item.stat()
+            entradas.append((info.st_mtime, info.st_size, item.path))
+    return entradas
+
+def tamanho_cache(cache_dir=CACHE_DIR):
+    return sum(tamanho for _, tamanho, _ in listar_entradas(cache_dir))
+
+def limpar_cache(cache_dir=CACHE_DIR, tamanho_maximo=CACHE_TAMANHO_MAXIMO):
+    """
+    Se o cache passou de tamanho_maximo, remove as entradas menos usadas até ele
+    ficar em CACHE_FOLGA do máximo. Retorna o tamanho que sobrou.
+    """
+    entradas = listar_entradas(cache_dir)
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    if total <= tamanho_maximo:
+        return total
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= tamanho_maximo * CACHE_FOLGA:
+            break
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass  # outro processo já removeu
+        total -= tamanho
+    return total
+
+# -------------------------
+# EXTRAÇÃO DE TEXTO
+# -------------------------
+def extrair_camada_texto(pdf_path, poppler_path=None):
+    """
+    Lê a camada de texto embutida no PDF com o pdftotext do poppler
+    (o mesmo pacote que o pdf2image já exige). Retorna uma lista com o texto
+    de cada página, ou lista vazia se não for possível ler.
+    """
+    comando = os.path.join(poppler_path, "pdftotext") if poppler_path else "pdftotext"
+    try:
+        saida = subprocess.run(
+            [comando, "-enc", "UTF-8", pdf_path, "-"],
+            capture_output=True,
+            check=True
+        ).stdout.decode("utf-8", errors="ignore")
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"⚠️ Não foi possível ler a camada de texto de {os.path.basename(pdf_path)}: {e}")
+        return []
+
+    # pdftotext termina cada página com \f, então o último pedaço é sempre vazio
+    paginas = saida.split("\f")
+    return paginas[:-1] if saida.endswith("\f") else paginas
+
+def texto_utilizavel(texto):
+    return sum(c.isalnum() for c in texto) >= MIN_CARACTERES_TEXTO
+
+def renderizar_pagina(pdf_path, numero, dpi=200, poppler_path=None):
+    """Rasteriza uma única página (numeração a partir de 1)."""
+    return convert_from_path(pdf_path, dpi=dpi, first_page=numero, last_page=numero,
+                             poppler_path=poppler_path)[0]
+
+def iterar_paginas(pdf_path, tesseract_config='--psm 6', tesseract_lang='por', dpi=200,
+                   preprocessar=None, max_paginas=None, poppler_path=None, usar_cache=True):
+    """
+    Gera (texto, origem) para cada página do PDF, uma de cada vez.
+    Usa a camada de texto quando ela existe e só renderiza + roda o tesseract
+    na página pedida se ela não tiver texto utilizável. Páginas já extraídas
+    com a mesma configuração vêm do cache em disco.
+    Se o consumidor parar o loop, nenhuma página seguinte é renderizada.
+    """
+    entrada = {"total_paginas": None, "paginas": {}}
+    if usar_cache:
+        chave = chave_cache(hash_arquivo(pdf_path), tesseract_config, tesseract_lang, dpi, preprocessar)
+        entrada = ler_cache(chave) or entrada
+    paginas = entrada["paginas"]  # {"1": [texto, origem], ...}
+
+    paginas_texto = None
+    total_paginas = entrada["total_paginas"]
+    if total_paginas is None:
+        paginas_texto = extrair_camada_texto(pdf_path, poppler_path)
+        if paginas_texto:
+            total_paginas = len(paginas_texto)
+        else:
+            total_paginas = pdfinfo_from_path(pdf_path, poppler_path=poppler_path)["Pages"]
+    quantidade = min(total_paginas, max_paginas) if max_paginas else total_paginas
+
+    novas = 0
+    try:
+        for numero in range(1, quantidade + 1):
+            if str(numero) not in paginas:
+                if paginas_texto is None:
+                    paginas_texto = extrair_camada_texto(pdf_path, poppler_path)
+                texto = paginas_texto[numero - 1] if numero <= len(paginas_texto) else ""
+                if texto_utilizavel(texto):
+                    paginas[str(numero)] = [texto, ORIGEM_TEXTO]
+                else:
+                    imagem = renderizar_pagina(pdf_path, numero, dpi, poppler_path)
+                    if preprocessar:
+                        imagem = preprocessar(imagem)
+                    texto = pytesseract.image_to_string(imagem, config=tesseract_config, lang=tesseract_lang)
+                    paginas[str(numero)] = [texto, ORIGEM_OCR]
+                novas += 1
+            yield tuple(paginas[str(numero)])
+    finally:
+        # Também roda quando o consumidor sai do loop antes do fim
+        if usar_cache and novas:
+            gravar_cache(chave, {"total_paginas": total_paginas, "paginas": paginas})
+
+def extrair_paginas(pdf_path, tesseract_config='--psm 6', tesseract_lang='por', dpi=200,
+                    preprocessar=None, max_paginas=None, poppler_path=None, usar_cache=True):
+    """
+    Extrai o texto de todas as páginas de uma vez (ver iterar_paginas).
+    Retorna lista de (texto, origem), com origem "texto" ou "ocr".
+    """
+    return list(iterar_paginas(pdf_path, tesseract_config, tesseract_lang, dpi,
+                               preprocessar, max_paginas, poppler_path, usar_cache))
@@ -0,0 +1,287 @@
+import os
+import re
+import shutil
+import zipfile
+import tempfile
+import posixpath
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+# Exportação dos resultados para o Excel.
+# Planilha nova: modo write_only do openpyxl.
+# Planilha existente: as linhas novas são inseridas direto no XML da aba, copiando o
+# resto do arquivo em blocos, sem carregar célula por célula com load_workbook.
+# O custo em Python depende só das linhas novas.
+
+NOME_ABA = "Resultados PDF"
+CABECALHOS_FIXOS = ['Arquivo Original', 'Arquivo Renomeado', 'Tipo']
+NS = {
+    'm': "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    'r': "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    'rel': "http://schemas.openxmlformats.org/package/2006/relationships"
+}
+TAMANHO_BLOCO = 64 * 1024
+
+RE_DIMENSAO = re.compile(rb'<dimension ref="([A-Z]+\d+)(?::([A-Z]+)(\d+))?"\s*/>')
+RE_COLUNAS = re.compile(rb'<cols>.*?</cols>', re.DOTALL)
+RE_NUMERO_LINHA = re.compile(rb'<row\b[^>]*?\br="(\d+)"')
+FIM_DADOS = b"</sheetData>"
+
+# --- Funções auxiliares ---
+
+def largura_coluna(tamanho):
+    return (tamanho + 2) * 1.2
+
+def tamanho_valor(valor):
+    return len(str(valor)) if valor is not None else 0
+
+def tamanhos_maximos(linhas):
+    """Maior tamanho de texto por coluna, só das linhas recebidas."""
+    tamanhos = []
+    for linha in linhas:
+        for i, valor in enumerate(linha):
+            if i >= len(tamanhos):
+                tamanhos.append(0)
+            tamanhos[i] = max(tamanhos[i], tamanho_valor(valor))
+    return tamanhos
+
+def montar_linha(res, cabecalhos):
+    linha = [
+        res['Arquivo Original'],
+        res.get('Arquivo Renomeado', ''),
+        res['Tipo']
+    ]
+    for campo in cabecalhos[3:]:
+        linha.append(res['Campos'].get(campo, "Não encontrado"))
+    return linha
+
+# --- Planilha nova ---
+
+def criar_excel(excel_path, resultados):
+    """Cria a planilha em modo write_only (linhas vão direto para o arquivo)."""
+    campos_unicos = set()
+    for res in resultados:
+        campos_unicos.update(res['Campos'].keys())
+    cabecalhos = CABECALHOS_FIXOS + sorted(campos_unicos)
+    linhas = [montar_linha(res, cabecalhos) for res in resultados]
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(NOME_ABA)
+    # Larguras precisam ser definidas antes da primeira linha no modo write_only
+    for i, tamanho in enumerate(tamanhos_maximos([cabecalhos] + linhas), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = largura_coluna(tamanho)
+
+    linha_cabecalho = []
+    for valor in cabecalhos:
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.font = Font(bold=True)
+        linha_cabecalho.append(cell)
+    ws.append(linha_cabecalho)
+    for linha in linhas:
+        ws.append(linha)
+
+    wb.save(excel_path)
+
+# --- Planilha existente: inserção incremental ---
+
+def localizar_aba(zip_entrada):
+    """Caminho, dentro do .xlsx, do XML da aba de resultados (ou da primeira aba)."""
+    workbook = ET.fromstring(zip_entrada.read("xl/workbook.xml"))
+    abas = workbook.findall("m:sheets/m:sheet", NS)
+    if not abas:
+        raise ValueError("planilha sem abas")
+    aba = next((a for a in abas if a.get("name") == NOME_ABA), abas[0])
+    rid = aba.get(f"{{{NS['r']}}}id")
+
+    relacoes = ET.fromstring(zip_entrada.read("xl/_rels/workbook.xml.rels"))
+    for relacao in relacoes.findall("rel:Relationship", NS):
+        if relacao.get("Id") == rid:
+            alvo = relacao.get("Target")
+            if alvo.startswith("/"):
+                return alvo.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", alvo))
+    raise ValueError(f"aba {aba.get('name')} sem arquivo correspondente")
+
+def ler_textos_compartilhados(zip_entrada, indices):
+    """Lê do sharedStrings.xml só até o maior índice pedido."""
+    textos = {}
+    if not indices:
+        return textos
+    maior = max(indices)
+    with zip_entrada.open("xl/sharedStrings.xml") as f:
+        posicao = 0
+        for _, elem in ET.iterparse(f):
+            if elem.tag == f"{{{NS['m']}}}si":
+                if posicao in indices:
+                    textos[posicao] = "".join(t.text or "" for t in elem.iter(f"{{{NS['m']}}}t"))
+                if posicao >= maior:
+                    break
+                posicao += 1
+                elem.clear()
+    return textos
+
+def ler_cabecalhos(zip_entrada, xml_linha):
+    """Valores da linha 1 (cabeçalho), a partir do trecho <row>...</row>."""
+    linha = ET.fromstring(xml_linha)
+    celulas = []
+    for posicao, c in enumerate(linha.findall("c"), start=1):
+        referencia = re.match(r"[A-Z]+", c.get("r", ""))
+        coluna = column_index_from_string(referencia.group()) if referencia else posicao
+        if c.get("t") == "inlineStr":
+            valor = "".join(t.text or "" for t in c.iter("t"))
+        elif c.get("t") == "s":
+            valor = int(c.findtext("v"))  # índice, resolvido abaixo
+        else:
+            valor = c.findtext("v")
+        celulas.append((coluna, c.get("t"), valor))
+
+    compartilhados = ler_textos_compartilhados(zip_entrada, {v for _, t, v in celulas if t == "s"})
+    cabecalhos = [None] * max((coluna for coluna, _, _ in celulas), default=0)
+    for coluna, tipo, valor in celulas:
+        cabecalhos[coluna - 1] = compartilhados[valor] if tipo == "s" else valor
+    return cabecalhos
+
+def atualizar_colunas(xml_colunas, tamanhos):
+    """Aumenta as larguras do <cols> que ficarem pequenas para as linhas novas."""
+    colunas = ET.fromstring(xml_colunas) if xml_colunas else ET.Element("cols")
+    cobertas = set()
+    for col in colunas:
+        inicio, fim = int(col.get("min")), int(col.get("max"))
+        necessario = max((tamanhos[i - 1] for i in range(inicio, fim + 1) if i <= len(tamanhos)), default=0)
+        largura = largura_coluna(necessario)
+        if largura > float(col.get("width", 0)):
+            col.set("width", f"{largura:g}")
+            col.set("customWidth", "1")
+        cobertas.update(range(inicio, fim + 1))
+    for i, tamanho in enumerate(tamanhos, start=1):
+        if i not in cobertas:
+            ET.SubElement(colunas, "col", min=str(i), max=str(i), width=f"{largura_coluna(tamanho):g}", customWidth="1")
+    colunas[:] = sorted(colunas, key=lambda col: int(col.get("min")))
+    return ET.tostring(colunas, encoding="unicode").encode("utf-8")
+
+def linha_xml(numero, valores):
+    celulas = []
+    for i, valor in enumerate(valores, start=1):
+        if valor is None:
+            continue
+        celulas.append(
+            f'<c r="{get_column_letter(i)}{numero}" t="inlineStr"><is><t>{escape(str(valor))}</t></is></c>'
+        )
+    return f'<row r="{numero}">{"".join(celulas)}</row>'.encode("utf-8")
+
+def copiar_aba_com_linhas(origem, destino, zip_entrada, resultados):
+    """
+    Copia o XML da aba em blocos, acrescentando as linhas novas antes de </sheetData>.
+    Retorna o número de linhas gravadas. Levanta ValueError se o XML não tiver o formato esperado.
+    """
+    # 1) Lê só o começo do XML, até o fim da linha de cabeçalho
+    inicio = b""
+    while True:
+        bloco = origem.read(TAMANHO_BLOCO)
+        inicio += bloco
+        dados = inicio.find(b"<sheetData")
+        fim_cabecalho = inicio.find(b"</row>", dados) if dados >= 0 else -1
+        if fim_cabecalho >= 0:
+            break
+        if not bloco:
+            raise ValueError("aba sem linha de cabeçalho")
+    fim_cabecalho += len(b"</row>")
+    inicio_cabecalho = inicio.index(b"<row", dados)
+    resto = inicio[fim_cabecalho:]
+    inicio = inicio[:fim_cabecalho]
+
+    cabecalhos = ler_cabecalhos(zip_entrada, inicio[inicio_cabecalho:])
+    if cabecalhos[:3] != CABECALHOS_FIXOS:
+        raise ValueError("cabeçalho diferente do esperado")
+    linhas = [montar_linha(res, cabecalhos) for res in resultados]
+
+    # 2) Ajusta <dimension> (opcional; o modo write_only não grava) e <cols> só com base nas linhas novas
+    dimensao = RE_DIMENSAO.search(inicio)
+    ultima_linha_dimensao = None
+    if dimensao:
+        canto = dimensao.group(1).decode()
+        ultima_linha_dimensao = int(dimensao.group(3) or re.search(r"\d+", canto).group())
+        ultima_coluna = max(len(cabecalhos), column_index_from_string((dimensao.group(2) or b"A").decode()))
+        nova_dimensao = f'<dimension ref="{canto}:{get_column_letter(ultima_coluna)}{ultima_linha_dimensao + len(linhas)}"/>'
+        inicio = inicio[:dimensao.start()] + nova_dimensao.encode("utf-8") + inicio[dimensao.end():]
+
+    colunas = RE_COLUNAS.search(inicio)
+    novas_colunas = atualizar_colunas(colunas.group().decode("utf-8") if colunas else None, tamanhos_maximos(linhas))
+    if colunas:
+        inicio = inicio[:colunas.start()] + novas_colunas + inicio[colunas.end():]
+    else:
+        posicao = inicio.index(b"<sheetData")
+        inicio = inicio[:posicao] + novas_colunas + inicio[posicao:]
+    destino.write(inicio)
+
+    # 3) Copia o resto em blocos até achar </sheetData>, conferindo o número da última linha
+    linha_encontrada = 1
+    pendente = resto
+    while True:
+        bloco = origem.read(TAMANHO_BLOCO)
+        buffer = pendente + bloco
+        fim = buffer.find(FIM_DADOS)
+        numeros = RE_NUMERO_LINHA.findall(buffer if fim < 0 else buffer[:fim])
+        if numeros:
+            linha_encontrada = int(numeros[-1])
+        if fim >= 0:
+            if ultima_linha_dimensao is not None and linha_encontrada != ultima_linha_dimensao:
+                raise ValueError("<dimension> não bate com a última linha da aba")
+            destino.write(buffer[:fim])
+            for i, linha in enumerate(linhas, start=linha_encontrada + 1):
+                destino.write(linha_xml(i, linha))
+            destino.write(buffer[fim:])
+            shutil.copyfileobj(origem, destino, TAMANHO_BLOCO)
+            return len(linhas)
+        if not bloco:
+            raise ValueError("aba sem </sheetData>")
+        # Guarda o final do buffer: a marcação pode estar dividida entre dois blocos
+        corte = max(0, len(buffer) - 64)
+        destino.write(buffer[:corte])
+        pendente = buffer[corte:]
+
+def anexar_excel(excel_path, resultados):
+    """Acrescenta as linhas na planilha existente sem carregá-la inteira."""
+    pasta = os.path.dirname(os.path.abspath(excel_path))
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".xlsx")
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(excel_path) as zip_entrada, \
+             zipfile.ZipFile(temporario, "w", zipfile.ZIP_DEFLATED) as zip_saida:
+            caminho_aba = localizar_aba(zip_entrada)
+            for item in zip_entrada.infolist():
+                with zip_entrada.open(item) as origem, zip_saida.open(item.filename, "w") as destino:
+                    if item.filename == caminho_aba:
+                        copiar_aba_com_linhas(origem, destino, zip_entrada, resultados)
+                    else:
+                        shutil.copyfileobj(origem, destino, TAMANHO_BLOCO)
+        os.replace(temporario, excel_path)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+# --- Planilha existente: modo completo (formato inesperado) ---
+
+def anexar_excel_completo(excel_path, resultados):
+    """Caminho antigo: carrega a planilha inteira, acrescenta e recalcula as larguras."""
+    wb = load_workbook(excel_path)
+    if NOME_ABA in wb.sheetnames:
+        ws = wb[NOME_ABA]
+    else:
+        ws = wb.active
+
+    # Descobre campos existentes no cabeçalho
+    cabecalhos_existentes = [cell.value for cell in ws[1]]
+    for res in resultados:
+        ws.append(montar_linha(res, cabecalhos_existentes))
+
+    # Ajusta largura das colunas
+    for column in ws.columns:
+        max_length = max(tamanho_valor(cell.value) for cell in column)
+        ws.column_dimensions[column[0].column_letter].width = largura_coluna(max_length)
+
+    wb.save(excel_path)
@@ -1,16 +1,20 @@
 import os
+import argparse
 import pytesseract
-import re
 import json
 import pandas as pd
-from pdf2image import convert_from_path
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font
+import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from extracao_pdf import iterar_paginas, hash_arquivo
+from extracao_campos import compilar_campos, extrair_campos as extrair_campos_motor
+from classificador_palavras import compilar_classificador, classificar_texto
+from planilha_excel import criar_excel, anexar_excel, anexar_excel_completo
 
 # --- Configurações globais ---
 tesseract_config = '--psm 6'
 tesseract_lang = 'por'
+processos_padrao = os.cpu_count() or 1  # usado no modo paralelo de processar_pasta
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Users\abrito\AppData\Local\Programs\Tesseract-OCR\tesseract.exe"
 # poppler_path = r"C:\Users\abrito\Documents\Release-24.08.0-0\poppler-24.08.0\Library\bin"
 
@@ -18,6 +22,13 @@ tesseract_lang = 'por'
 DEFINIR_NF = {"Prefeitura", "Nota Fiscal", "Nota de Serviço", "Recibo"}
 DEFINIR_BOLETO = {"Linha Digitável", "Código de Barras", "Agência/Código do Beneficiário", "Linha Digitavel", "Agência", "Código do Beneficiário"}
 
+# Classificador por palavras-chave montado uma vez (sem acento, sem diferenciar maiúsculas).
+# Termos de boleto pesam mais para manter a regra antiga: qualquer um deles decide.
+CLASSIFICADOR_PALAVRAS = compilar_classificador({
+    "BOLETO": dict.fromkeys(DEFINIR_BOLETO, 10),
+    "NF": dict.fromkeys(DEFINIR_NF, 1)
+})
+
 CAMPOS_BOLETO = {
     "Número do Documento": r"\d{5,9}",
     "Vencimento": r"\d{2}/\d{2}/\d{4}",
@@ -32,124 +43,238 @@ CAMPOS_NF = {
     "Valor Total do Serviço": r"R?\$?\s*\d{1,3}(?:\.\d{3})*,\d{2}"
 }
 
+# Regex compiladas uma vez só
+MOTOR_BOLETO = compilar_campos(CAMPOS_BOLETO)
+MOTOR_NF = compilar_campos(CAMPOS_NF)
+
+# Campos que identificam um documento já registrado, por tipo
+CAMPOS_CHAVE = {
+    'NF': ('Número da Nota', 'Data e Hora de Emissão'),
+    'BOLETO': ('Número do Documento', 'Vencimento')
+}
+
 # --- Funções do histórico ---
+# O histórico fica numa pasta com um arquivo JSONL por dia (AAAA-MM-DD.log).
+# Limpar registros antigos é só apagar os arquivos dos dias vencidos.
+
+PARTICAO_SEM_DATA = "sem_data.log"  # registros antigos sem data_processo
 
-def limpar_log_antigo(caminho_log, dias_retencao=45):
+def data_particao(nome_arquivo):
+    """Data do arquivo de partição (AAAA-MM-DD.log) ou None se não for uma partição diária."""
+    try:
+        return datetime.strptime(nome_arquivo, "%Y-%m-%d.log").date()
+    except ValueError:
+        return None
+
+def migrar_log_legado(caminho_log_legado, pasta_historico):
     """
-    Remove registros do log com mais de X dias (padrão: 45 dias)
-    Retorna True se houve alteração no arquivo, False caso contrário
+    Distribui o antigo arquivos_processados.log (um arquivo só) nas partições por dia.
+    Roda uma única vez: depois o arquivo é renomeado para .migrado
     """
-    if not os.path.exists(caminho_log):
+    if not os.path.isfile(caminho_log_legado):
         return False
-    
+
+    os.makedirs(pasta_historico, exist_ok=True)
+    particoes = {}
+    with open(caminho_log_legado, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                registro = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ Erro ao processar linha do log: {e}")
+                continue
+            data_processo = registro.get('data_processo', '')
+            nome = f"{data_processo[:10]}.log" if data_particao(f"{data_processo[:10]}.log") else PARTICAO_SEM_DATA
+            particoes.setdefault(nome, []).append(line.strip())
+
+    for nome, linhas in particoes.items():
+        with open(os.path.join(pasta_historico, nome), 'a', encoding='utf-8') as f:
+            f.write("\n".join(linhas) + "\n")
+
+    os.replace(caminho_log_legado, caminho_log_legado + ".migrado")
+    print(f"📦 Histórico migrado para partições diárias em: {pasta_historico}")
+    return True
+
+def limpar_log_antigo(pasta_historico, dias_retencao=45):
+    """
+    Remove as partições do histórico com mais de X dias (padrão: 45 dias)
+    Retorna True se alguma partição foi apagada, False caso contrário
+    """
+    if not os.path.isdir(pasta_historico):
+        return False
+
     try:
         # Data limite para manutenção (hoje - dias_retencao)
-        data_limite = datetime.now() - timedelta(days=dias_retencao)
-        registros_atualizados = []
-        alterado = False
-        
-        with open(caminho_log, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    registro = json.loads(line.strip())
-                    # Verifica se o registro tem data_processo e se é antigo
-                    if 'data_processo' in registro:
-                        data_registro = datetime.strptime(registro['data_processo'], "%Y-%m-%d %H:%M:%S")
-                        if data_registro >= data_limite:
-                            registros_atualizados.append(registro)
-                        else:
-                            alterado = True
-                    else:
-                        # Mantém registros sem data (para backward compatibility)
-                        registros_atualizados.append(registro)
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"⚠️ Erro ao processar linha do log: {e}")
-                    continue
-        
-        # Se houve registros removidos, reescreve o arquivo
-        if alterado:
-            with open(caminho_log, 'w', encoding='utf-8') as f:
-                for registro in registros_atualizados:
-                    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
-            print(f"♻️ Log limpo: removidos registros com mais de {dias_retencao} dias")
-        
-        return alterado
-    
-    except Exception as e:
+        data_limite = (datetime.now() - timedelta(days=dias_retencao)).date()
+        removidas = 0
+        for nome in os.listdir(pasta_historico):
+            data = data_particao(nome)
+            if data is not None and data < data_limite:
+                os.remove(os.path.join(pasta_historico, nome))
+                removidas += 1
+
+        if removidas:
+            print(f"♻️ Log limpo: removidas {removidas} partições com mais de {dias_retencao} dias")
+        return removidas > 0
+
+    except OSError as e:
         print(f"❌ Erro ao limpar log: {str(e)}")
         return False
 
-def ler_log(caminho_log):
+def ler_log(pasta_historico, dias_retencao=45):
+    """Lê só as partições dentro da janela de retenção (mais a de registros sem data)."""
     historico = []
-    if os.path.exists(caminho_log):
+    if not os.path.isdir(pasta_historico):
+        return historico
+
+    data_limite = (datetime.now() - timedelta(days=dias_retencao)).date()
+    for nome in sorted(os.listdir(pasta_historico)):
+        data = data_particao(nome)
+        if nome != PARTICAO_SEM_DATA and (data is None or data < data_limite):
+            continue
         try:
-            with open(caminho_log, 'r', encoding='utf-8') as f:
+            with open(os.path.join(pasta_historico, nome), 'r', encoding='utf-8') as f:
                 for line in f:
-                    historico.append(json.loads(line.strip()))
-        except (IOError, json.JSONDecodeError) as e:
-            print(f"⚠️ Erro ao ler ou decodificar o arquivo de histórico: {e}")
-            historico = []
+                    if not line.strip():
+                        continue
+                    try:
+                        historico.append(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️ Erro ao decodificar linha do histórico {nome}: {e}")
+        except IOError as e:
+            print(f"⚠️ Erro ao ler o arquivo de histórico {nome}: {e}")
     return historico
 
-def adicionar_ao_historico(caminho_log, resultado):
-    with open(caminho_log, 'a', encoding='utf-8') as f:
+def adicionar_ao_historico(pasta_historico, resultado, indice=None):
+    agora = datetime.now()
+    os.makedirs(pasta_historico, exist_ok=True)
+    with open(os.path.join(pasta_historico, agora.strftime("%Y-%m-%d.log")), 'a', encoding='utf-8') as f:
         log_data = {
             'arquivo': resultado['Arquivo Original'],
             'tipo': resultado['Tipo'],
             'campos_extraidos': resultado['Campos'],
-            'data_processo': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            'data_processo': agora.strftime("%Y-%m-%d %H:%M:%S")
         }
         f.write(json.dumps(log_data, ensure_ascii=False) + "\n")
 
+    # Mantém o índice em memória igual ao arquivo
+    if indice is not None:
+        chave = chave_documento(resultado['Tipo'], resultado['Campos'])
+        if chave is not None:
+            indice.add(chave)
+
 # --- Funções de verificação ---
 
-def documento_ja_registrado(dados_log, tipo, campos):
-    """Verifica se documento com mesmo tipo e campos-chave já existe no log."""
+def chave_documento(tipo, campos):
+    """Monta a chave (tipo, campos-chave...) do documento; None se o tipo não tem chave."""
+    nomes_campos = CAMPOS_CHAVE.get(tipo)
+    if nomes_campos is None:
+        return None
+    return (tipo,) + tuple(campos.get(nome) for nome in nomes_campos)
+
+def indexar_historico(dados_log):
+    """Monta uma vez, a partir do ler_log, o conjunto de chaves já registradas."""
+    indice = set()
     for log_item in dados_log:
-        if log_item.get('tipo') != tipo:
-            continue
-        if tipo == 'NF':
-            if (log_item['campos_extraidos'].get('Data e Hora de Emissão') == campos.get('Data e Hora de Emissão') and
-                log_item['campos_extraidos'].get('Número da Nota') == campos.get('Número da Nota')):
-                return True
-        elif tipo == 'BOLETO':
-            if (log_item['campos_extraidos'].get('Vencimento') == campos.get('Vencimento') and
-                log_item['campos_extraidos'].get('Número do Documento') == campos.get('Número do Documento')):
-                return True
-    return False
+        chave = chave_documento(log_item.get('tipo'), log_item.get('campos_extraidos', {}))
+        if chave is not None:
+            indice.add(chave)
+    return indice
+
+def documento_ja_registrado(indice, tipo, campos):
+    """Verifica se documento com mesmo tipo e campos-chave já existe no log (consulta O(1) no índice)."""
+    chave = chave_documento(tipo, campos)
+    return chave is not None and chave in indice
+
+# --- Manifesto de arquivos já processados ---
+# Consultado antes de qualquer renderização/OCR. Chave principal é o hash do conteúdo;
+# nome + tamanho + mtime servem de atalho para nem precisar ler o arquivo.
+
+def carregar_manifesto(caminho_manifesto):
+    if os.path.exists(caminho_manifesto):
+        try:
+            with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"⚠️ Erro ao ler o manifesto, começando um novo: {e}")
+    return {'hashes': {}, 'arquivos': {}}
+
+def salvar_manifesto(caminho_manifesto, manifesto):
+    temporario = caminho_manifesto + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False)
+    os.replace(temporario, caminho_manifesto)
+
+def verificar_manifesto(manifesto, caminho):
+    """Retorna (ja_processado, hash). O hash só é calculado se o atalho nome/tamanho/mtime falhar."""
+    info = os.stat(caminho)
+    nome = os.path.basename(caminho)
+    atalho = manifesto['arquivos'].get(nome)
+    if atalho and atalho[0] == info.st_size and atalho[1] == info.st_mtime_ns:
+        return True, atalho[2]
+
+    sha = hash_arquivo(caminho)
+    if sha in manifesto['hashes']:
+        # Mesmo conteúdo com outro nome/mtime: atualiza o atalho
+        manifesto['arquivos'][nome] = [info.st_size, info.st_mtime_ns, sha]
+        return True, sha
+    return False, sha
+
+def registrar_no_manifesto(manifesto, caminho, resultado, sha=None):
+    """Registra o arquivo (já com o nome final, depois de renomear_pdf) como processado."""
+    info = os.stat(caminho)
+    sha = sha or hash_arquivo(caminho)
+    manifesto['hashes'][sha] = {
+        'arquivo': os.path.basename(caminho),
+        'tipo': resultado['Tipo'],
+        'data_processo': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    manifesto['arquivos'][os.path.basename(caminho)] = [info.st_size, info.st_mtime_ns, sha]
 
 # --- Funções de processamento ---
 
+def renomear_sem_sobrescrever(origem, destino):
+    """os.rename que nunca apaga um arquivo existente (FileExistsError se destino já existe)."""
+    try:
+        os.link(origem, destino)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Sistema de arquivos sem hard link; no Windows o rename já falha se o destino existe
+        if os.path.exists(destino):
+            raise FileExistsError(destino)
+        os.rename(origem, destino)
+        return
+    os.remove(origem)
+
 def renomear_pdf(caminho, tipo):
     pasta, nome_arquivo = os.path.split(caminho)
     nome, ext = os.path.splitext(nome_arquivo)
-    if not nome.endswith(f"_{tipo}"):
-        novo_nome = f"{nome}_{tipo}{ext}"
+    if nome.endswith(f"_{tipo}"):
+        return caminho
+    # O nome original pode se repetir depois de um arquivo igual já ter sido renomeado
+    # (o e-mail reaproveita "remetente - data.pdf"): nesse caso vai para "nome (2)_TIPO", "nome (3)_TIPO"...
+    contador = 1
+    while True:
+        novo_nome = f"{nome}_{tipo}{ext}" if contador == 1 else f"{nome} ({contador})_{tipo}{ext}"
         novo_caminho = os.path.join(pasta, novo_nome)
-        os.rename(caminho, novo_caminho)
-        print(f"📂 Arquivo renomeado para: {novo_nome}")
-        return novo_caminho
-    return caminho
+        try:
+            renomear_sem_sobrescrever(caminho, novo_caminho)
+            break
+        except FileExistsError:
+            contador += 1
+    print(f"📂 Arquivo renomeado para: {novo_nome}")
+    return novo_caminho
 
 def detectar_tipo_documento(texto_continuo):
-    texto_lower = texto_continuo.lower()
-    if any(p.lower() in texto_lower for p in DEFINIR_BOLETO):
-        return "BOLETO"
-    if any(p.lower() in texto_lower for p in DEFINIR_NF):
-        return "NF"
-    return "BOLETO"
-
-def extrair_campos(texto_continuo, campos):
-    encontrados = {}
-    for chave, padrao_base in campos.items():
-        if re.search(re.escape(chave), texto_continuo, re.IGNORECASE):
-            padrao = re.search(
-                rf"{re.escape(chave)}.*?({padrao_base})", 
-                texto_continuo, 
-                re.IGNORECASE | re.DOTALL
-            )
-            encontrados[chave] = padrao.group(1).strip() if padrao else "Não encontrado"
-    return encontrados
+    tipo, _, _ = classificar_texto(texto_continuo, CLASSIFICADOR_PALAVRAS)
+    return tipo or "BOLETO"
+
+def extrair_campos(texto_continuo, motor):
+    encontrados = extrair_campos_motor(texto_continuo, motor)
+    return {chave: valor.strip() if valor else "Não encontrado" for chave, valor in encontrados.items()}
 
 def processar_pdf(pdf_path):
     print(f"\n🔍 Processando o arquivo: {os.path.basename(pdf_path)}...")
@@ -157,30 +282,32 @@ def processar_pdf(pdf_path):
         'Arquivo Original': os.path.basename(pdf_path),
         'Arquivo Renomeado': '',
         'Tipo': '',
-        'Campos': {}
+        'Campos': {},
+        'Origem Páginas': []
     }
     try:
-        imagens = convert_from_path(pdf_path)  # poppler_path=poppler_path
+        # Páginas lidas uma a uma (camada de texto primeiro; OCR só se precisar)
+        # Tipo e campos saem da primeira página: a segunda nem é renderizada
+        paginas = iterar_paginas(pdf_path, tesseract_config, tesseract_lang, max_paginas=1)  # poppler_path=poppler_path
         tipo_documento = None
-        campos_referencia = {}
+        texto_continuo = ""
         
-        for i, imagem in enumerate(imagens[:2]):
-            texto = pytesseract.image_to_string(imagem, config=tesseract_config, lang=tesseract_lang)
+        for texto, origem in paginas:
+            resultado['Origem Páginas'].append(origem)
             texto_continuo = " ".join(texto.split())
-            
-            if tipo_documento is None:
-                tipo_documento = detectar_tipo_documento(texto_continuo)
-                resultado['Tipo'] = tipo_documento
-                campos_referencia = CAMPOS_NF if tipo_documento == "NF" else CAMPOS_BOLETO
-                
-                novo_caminho = renomear_pdf(pdf_path, tipo_documento)
-                resultado['Arquivo Renomeado'] = os.path.basename(novo_caminho)
-            
-            if i == 0:
-                campos_encontrados = extrair_campos(texto_continuo, campos_referencia)
-                resultado['Campos'].update(campos_encontrados)
+            tipo_documento = detectar_tipo_documento(texto_continuo)
+            resultado['Tipo'] = tipo_documento
+            motor_campos = MOTOR_NF if tipo_documento == "NF" else MOTOR_BOLETO
+            resultado['Campos'].update(extrair_campos(texto_continuo, motor_campos))
+        paginas.close()
+
+        # Renomeia só depois de terminar a leitura do arquivo
+        if tipo_documento is not None:
+            novo_caminho = renomear_pdf(pdf_path, tipo_documento)
+            resultado['Arquivo Renomeado'] = os.path.basename(novo_caminho)
         
         print(f"✅ Processado: {resultado['Tipo']}")
+        print(f"   Origem das páginas: {', '.join(resultado['Origem Páginas'])}")
         print(f"   Campos encontrados: {', '.join([f'{k}: {v}' for k, v in resultado['Campos'].items()])}")
         print(texto_continuo)
         return resultado
@@ -197,58 +324,39 @@ def exportar_para_excel(resultados, pasta_saida, nome_arquivo="resultados_pdfs.x
 
     excel_path = os.path.join(pasta_saida, nome_arquivo)
 
-    # Se já existir, abre o arquivo existente
-    if os.path.exists(excel_path):
-        wb = load_workbook(excel_path)
-        if "Resultados PDF" in wb.sheetnames:
-            ws = wb["Resultados PDF"]
-        else:
-            ws = wb.active
+    if not os.path.exists(excel_path):
+        # Cria novo workbook (write_only) com cabeçalhos
+        criar_excel(excel_path, resultados)
     else:
-        # Cria novo workbook e adiciona cabeçalhos
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Resultados PDF"
-        cabecalhos = ['Arquivo Original', 'Arquivo Renomeado', 'Tipo']
-        campos_unicos = set()
-        for res in resultados:
-            campos_unicos.update(res['Campos'].keys())
-        cabecalhos.extend(sorted(campos_unicos))
-        ws.append(cabecalhos)
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-
-    # Descobre campos existentes no cabeçalho
-    cabecalhos_existentes = [cell.value for cell in ws[1]]
-
-    for res in resultados:
-        linha = [
-            res['Arquivo Original'],
-            res.get('Arquivo Renomeado', ''),
-            res['Tipo']
-        ]
-        for campo in cabecalhos_existentes[3:]:
-            linha.append(res['Campos'].get(campo, "Não encontrado"))
-        ws.append(linha)
-
-    # Ajusta largura das colunas
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2) * 1.2
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    wb.save(excel_path)
+        # Acrescenta só as linhas novas, sem carregar a planilha inteira
+        try:
+            anexar_excel(excel_path, resultados)
+        except (ValueError, KeyError, ET.ParseError) as e:
+            print(f"⚠️ Formato inesperado para anexar direto ({e}), regravando a planilha inteira...")
+            anexar_excel_completo(excel_path, resultados)
+
     print(f"\n📊 Resultados adicionados em: {excel_path}")
     return excel_path
 
-def processar_pasta(pasta_entrada, pasta_saida=None):
+def processar_pdfs(pdf_paths, processos=1):
+    """
+    Executa processar_pdf para cada caminho, em série ou em um pool de processos.
+    Os resultados voltam sempre na mesma ordem de pdf_paths.
+    """
+    if processos <= 1 or len(pdf_paths) <= 1:
+        return [processar_pdf(pdf_path) for pdf_path in pdf_paths]
+
+    processos = min(processos, len(pdf_paths))
+    print(f"⚙️ Processando em paralelo com {processos} processos...")
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        # map preserva a ordem de entrada, independente de qual processo termina primeiro
+        return list(executor.map(processar_pdf, pdf_paths))
+
+def processar_pasta(pasta_entrada, pasta_saida=None, processos=1, forcar=False):
+    """
+    Processa os PDFs da pasta e exporta os novos para o Excel.
+    Arquivos que já estão no manifesto são pulados antes do OCR, a não ser com forcar=True.
+    """
     if pasta_saida is None:
         pasta_saida = pasta_entrada
     
@@ -259,38 +367,67 @@ def processar_pasta(pasta_entrada, pasta_saida=None):
     if not os.path.exists(pasta_saida):
         os.makedirs(pasta_saida)
 
-    caminho_historico = os.path.join(pasta_saida, "arquivos_processados.log")
+    caminho_historico = os.path.join(pasta_saida, "arquivos_processados")
+    migrar_log_legado(os.path.join(pasta_saida, "arquivos_processados.log"), caminho_historico)
     limpar_log_antigo(caminho_historico)
-    historico_processados = ler_log(caminho_historico)
+    indice_processados = indexar_historico(ler_log(caminho_historico))
+
+    caminho_manifesto = os.path.join(pasta_saida, "manifesto_processados.json")
+    manifesto = carregar_manifesto(caminho_manifesto)
 
-    pdfs = [f for f in os.listdir(pasta_entrada) if f.lower().endswith('.pdf')]
+    pdfs = sorted(f for f in os.listdir(pasta_entrada) if f.lower().endswith('.pdf'))
     if not pdfs:
         print(f"❌ Nenhum arquivo PDF encontrado em: {pasta_entrada}")
         return
     
     print(f"\n📂 Encontrados {len(pdfs)} arquivos PDF para processar...")
-    
-    resultados = []
+
+    # Pula, antes de renderizar, os arquivos que já foram processados
+    pendentes = []
+    hashes = {}
     for pdf in pdfs:
-        pdf_path = os.path.join(pasta_entrada, pdf)
+        if forcar:
+            pendentes.append(pdf)
+            continue
+        ja_processado, hashes[pdf] = verificar_manifesto(manifesto, os.path.join(pasta_entrada, pdf))
+        if ja_processado:
+            print(f"⏩ Arquivo já processado (manifesto), pulando: {pdf}")
+        else:
+            pendentes.append(pdf)
+    
+    # Processa para extrair dados (OCR pode rodar em paralelo)
+    pdf_paths = [os.path.join(pasta_entrada, pdf) for pdf in pendentes]
+    resultados_pdf = processar_pdfs(pdf_paths, processos)
 
-        # Processa sempre para extrair dados
-        resultado = processar_pdf(pdf_path)
+    # Histórico, manifesto e exportação ficam só no processo principal
+    resultados = []
+    for pdf, resultado in zip(pendentes, resultados_pdf):
+        if resultado['Tipo'].startswith("ERRO"):
+            continue
+        caminho_final = os.path.join(pasta_entrada, resultado['Arquivo Renomeado'] or pdf)
 
         # Se já existe no log com mesmos campos, pula exportação
-        if documento_ja_registrado(historico_processados, resultado['Tipo'], resultado['Campos']):
+        if documento_ja_registrado(indice_processados, resultado['Tipo'], resultado['Campos']):
             print(f"⏩ Documento já registrado no log, pulando exportação: {pdf}")
+            registrar_no_manifesto(manifesto, caminho_final, resultado, hashes.get(pdf))
             continue
 
-        if not resultado['Tipo'].startswith("ERRO") and resultado['Campos']:
-            adicionar_ao_historico(caminho_historico, resultado)
+        if resultado['Campos']:
+            adicionar_ao_historico(caminho_historico, resultado, indice_processados)
+            registrar_no_manifesto(manifesto, caminho_final, resultado, hashes.get(pdf))
             resultados.append(resultado)
-            
+
+    salvar_manifesto(caminho_manifesto, manifesto)
     exportar_para_excel(resultados, pasta_saida)
 
 if __name__ == "__main__":
     PASTA_PDFS = "soauto/automacao-main/Boletos"
     PASTA_SAIDA = "soauto/automacao-main/Excel"
+
+    parser = argparse.ArgumentParser(description="Processa boletos e notas fiscais em PDF")
+    parser.add_argument("--force", action="store_true", help="reprocessa arquivos que já estão no manifesto")
+    parser.add_argument("--processos", type=int, default=processos_padrao, help="processos para o OCR em paralelo")
+    args = parser.parse_args()
     
     try:
         pytesseract.get_tesseract_version()
@@ -298,4 +435,4 @@ if __name__ == "__main__":
         print("❌ Tesseract OCR não está instalado ou não está no PATH")
         exit()
     
-    processar_pasta(PASTA_PDFS, PASTA_SAIDA)
\ No newline at end of file
+    processar_pasta(PASTA_PDFS, PASTA_SAIDA, processos=args.processos, forcar=args.force)
\ No newline at end of file